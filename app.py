@@ -1,10 +1,11 @@
 import streamlit as st
-import numpy as np
-import librosa
 import psychometric_tests
+from app_components import adaptive_questionnaire, score_responses, show_voice_results
+from color_mood import mood_for_color
+from voice_workers import QueueFullError, submit_voice_analysis
 from st_audiorec import st_audiorec
-from textblob import TextBlob  # Import TextBlob
-import nltk
+import sentiment
+import text_emotions
 
 # Configure page
 st.set_page_config(
@@ -13,16 +14,6 @@ st.set_page_config(
     layout="wide"
 )
 
-# Download NLTK resources (only runs once per session)
-@st.cache_resource
-def download_nltk_resources():
-    try:
-        nltk.data.find('vader_lexicon/vader_lexicon.zip')
-    except LookupError:
-        nltk.download('vader_lexicon') # Download the resource
-
-download_nltk_resources()
-
 # Initialize models (cached for performance)
 # No more Hugging Face model
 @st.cache_resource
@@ -31,112 +22,160 @@ def load_models():
 
 models = load_models() 
 
-with open("style.css") as css:
-    st.markdown(f'<style>{css.read()}</style>', unsafe_allow_html=True)
-
-
-# Color-Mood Mapping
-COLOR_MOOD_MAP = {
-    'red': 'Angry/Passionate',
-    'blue': 'Calm/Peaceful',
-    'green': 'Balanced/Hopeful',
-    'yellow': 'Happy/Energetic',
-    'orange': 'Excited/Enthusiastic',
-    'purple': 'Creative/Mysterious',
-    'pink': 'Loving/Playful',
-    'brown': 'Stable/Grounded',
-    'black': 'Depressed/Anxious',
-    'white': 'Pure/Innocent',
-    'gray': 'Neutral/Indifferent',
-    'teal': 'Refreshed/Calm',
-    'magenta': 'Bold/Innovative',
-    'lavender': 'Relaxed/Serene',
-    'gold': 'Joyful/Optimistic',
-    'silver': 'Calm/Reflective',
-    'turquoise': 'Refreshed/Calm',
-    'maroon': 'Serious/Disciplined',
-    'navy': 'Trusting/Reliable',
-    'beige': 'Comfortable/Relaxed'
-}
-
+# Read once per process rather than on every rerun
+@st.cache_resource
+def load_css():
+    with open("style.css") as css:
+        return css.read()
 
-# Function to convert hex to RGB
-def hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip("#")
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+st.markdown(f'<style>{load_css()}</style>', unsafe_allow_html=True)
 
 
-# Function to find the nearest color
-def find_nearest_color(selected_hex, simple_colors):
-    selected_rgb = hex_to_rgb(selected_hex)
-    min_distance = float("inf")
-    nearest_color = "gray"  # Default color if no match is found
+def render_voice_results(job):
+    try:
+        voice_analysis = job.result()
+    except Exception as e:
+        st.error(f"Voice analysis failed: {e}")
+        return
+
+    results = []
+    if isinstance(voice_analysis, dict):
+        results.append(f"🎤 **Voice Analysis**:")
+        results.append(f"- Average pitch: {voice_analysis['mean_pitch_hz']} Hz")
+        results.append(f"- Pitch variability: {voice_analysis['pitch_variability']} Hz")
+        results.append(f"- Speech continuity: {voice_analysis['voiced_speech_percent']}% voiced")
+        results.append(f"- Loudness: {voice_analysis['mean_energy_db']} dBFS (variability {voice_analysis['energy_variability_db']} dB)")
+        results.append(f"- Voice brightness (spectral centroid): {voice_analysis['spectral_centroid_hz']} Hz")
+        results.append(f"- Pauses: {voice_analysis['pause_count']} (average {voice_analysis['mean_pause_s']} s, longest {voice_analysis['longest_pause_s']} s)")
+        results.append("--- Emotional indicators:")
+        for item in voice_analysis['interpretation']:
+            results.append(f"  • {item.capitalize()}")
+    else:
+        results.append(f"🎤 **Voice Analysis Results:** {voice_analysis}")
+    st.markdown("\n\n".join(results))
 
-    for hex_code, color_name in simple_colors.items():
-        color_rgb = hex_to_rgb(hex_code)
-        distance = np.linalg.norm(np.array(selected_rgb) - np.array(color_rgb))
-        if distance < min_distance:
-            min_distance = distance
-            nearest_color = color_name
 
-    return nearest_color
+def questionnaire_section():
+    """
+    Section 3: the test choice and the selected test's questions.
 
+    The test choice stays outside any form so switching tests redraws the
+    questions. Answers to a full test are submitted in a form of their own;
+    adaptive mode needs callbacks, which forms do not allow.
 
-def analyze_voice(audio_file):
-    y, sr = librosa.load(audio_file, sr=None)
+    Returns:
+        tuple: (test name, adaptive, responses or None while unfinished).
+    """
+    st.subheader("Emotion Assessment")
+    st.markdown("""
+    <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
+    Validated psychometric tests and assessment tools used to detect emotions, mental states, and mental health conditions. Useful to assess conditions like anxiety, depression, stress, and more.
+    </div>
+    """, unsafe_allow_html=True)
+    selected_test = st.selectbox("Select a test to take:", list(psychometric_tests.TESTS.keys()), index=7)
+    adaptive = st.toggle("Adaptive mode: one question at a time, stopping once the result is certain")
+
+    # Display the selected test
+    test_data = psychometric_tests.TESTS[selected_test]
+    if adaptive:
+        with st.container(border=True, height=400):
+            return selected_test, adaptive, adaptive_questionnaire(selected_test, test_data, "adaptive")
+
+    # Collect user responses
+    with st.form("questionnaire", border=False):
+        with st.container(border=True, height=400):
+            responses = []
+            for i, question in enumerate(test_data["questions"]):
+                response = st.radio(
+                    f"{i + 1}. {question}",
+                    options=test_data["options"],
+                    key=f"q{i}"
+                )
+                responses.append(test_data["scoring"][test_data["options"].index(response)])
+        st.form_submit_button("**Save responses**")
+    return selected_test, adaptive, responses
+
+
+SUBSCALE_ICONS = {
+    "Depression": "😔", "Anxiety": "😟", "Stress": "😫",
+    "Positive Affect": "😄", "Negative Affect": "☹️"
+}
 
-    # Extract pitch using YIN algorithm
-    pitch = librosa.yin(y, fmin=50, fmax=2000)
-    pitch = pitch[pitch > 0]  # Remove unvoiced frames
 
-    if len(pitch) == 0:
-        return "No speech detected in audio"
+def analyze_inputs(color, journal_text, sentiment_backend, selected_test, responses, adaptive):
+    """Score everything once when the user asks for the analysis."""
+    report = {"color_mood": mood_for_color(color), "sentiment": None, "emotions": None,
+              "psychometric": score_responses(selected_test, responses, adaptive)}
+    if journal_text:
+        report["sentiment"] = sentiment.analyze_document(journal_text, sentiment_backend)
+        report["emotions"] = text_emotions.analyze_emotions(journal_text)
+    return report
+
+
+# A fragment, so the results panel (and its voice polling) re-executes on its
+# own instead of rerunning the input forms
+@st.fragment
+def results_panel():
+    report = st.session_state.report
+    with st.container(border=True):
+        st.subheader("Emotion Analysis Results")
+        # Disclaimer
+        st.markdown("""
+        <div style="background:#EAEAED; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
+        <strong style="color:#ff4c4b">Note:</strong> This is not a medical diagnosis. Consult a professional for medical advice.
+        </div>
+        """, unsafe_allow_html=True)
+
+        # 1. Color Analysis
+        st.markdown(f"""
+            <div>
+            🎨 <strong style="font-size:large">Color Mood Results: </strong>{report["color_mood"]}<br><br>
+            </div>
+            """, unsafe_allow_html=True)
 
-    # Calculate pitch characteristics
-    mean_pitch = np.mean(pitch)
-    pitch_std = np.std(pitch)
-    voiced_frames_ratio = len(pitch) / len(y) * 100  # Percentage of voiced speech
+        # 2. Text Analysis
+        if report["sentiment"] is not None:
+            sentiment_polarity = report["sentiment"]["polarity"]
+            sentiment_subjectivity = report["sentiment"]["subjectivity"]
 
-    # Emotional state interpretation based on pitch characteristics
-    interpretation = []
+            sentiment_label = "Neutral"
+            if sentiment_polarity > 0.1:
+                sentiment_label = "Positive"
+            elif sentiment_polarity < -0.1:
+                sentiment_label = "Negative"
 
-    # Pitch height analysis
-    if mean_pitch < 85:
-        interpretation.append("low pitch (possibly indicating sadness, fatigue, or depression)")
-    elif 85 <= mean_pitch < 165:
-        interpretation.append("moderate pitch (typical for calm, relaxed speech)")
-    elif 165 <= mean_pitch < 255:
-        interpretation.append("elevated pitch (could indicate stress or anxiety)")
-    elif 255 <= mean_pitch < 350:
-        interpretation.append("high pitch (may suggest excitement or anxiety)")
-    else:
-        interpretation.append("very high pitch (could indicate strong emotions)")
+            st.markdown(f"""
+            <div>
+            📝 <strong style="font-size:large">Text Sentiment Results: </strong>{sentiment_label} (Polarity: {sentiment_polarity:.2f}, Subjectivity: {sentiment_subjectivity:.2f})<br>
+            </div>
+            """, unsafe_allow_html=True)
 
-    # Pitch variability analysis
-    if pitch_std < 15:
-        interpretation.append("monotonous speech (possibly indicating depression or fatigue)")
-    elif 15 <= pitch_std < 30:
-        interpretation.append("normal pitch variation")
-    else:
-        interpretation.append("high pitch variability (may suggest emotional stress or excitement)")
+            trajectory = report["sentiment"]["sentences"]
+            if len(trajectory) > 1:
+                st.caption("Polarity sentence by sentence")
+                st.line_chart([entry["polarity"] for entry in trajectory], height=160)
 
-    # Voiced speech analysis
-    if voiced_frames_ratio < 60:
-        interpretation.append("frequent pauses (could indicate anxiety or cognitive load)")
-    elif 60 <= voiced_frames_ratio < 80:
-        interpretation.append("normal speech flow")
-    else:
-        interpretation.append("rapid speech (may suggest excitement or stress)")
+            emotions = report["emotions"]
+            if emotions["dominant"] is None:
+                st.write("🎭 **Ekman emotions**: no emotion words found")
+            else:
+                st.write(f"🎭 **Ekman emotions**: mostly {emotions['dominant']}")
+                st.bar_chart(emotions["intensities"], height=200)
 
-    # Create final report
-    analysis = {
-        "mean_pitch_hz": round(float(mean_pitch), 1),
-        "pitch_variability": round(float(pitch_std), 1),
-        "voiced_speech_percent": round(voiced_frames_ratio, 1),
-        "interpretation": interpretation
-    }
+        # 3. Psychometric Test Analysis
+        st.markdown(f"""
+        <div>
+        😶 <strong style="font-size:large">Emotion Assessment Results:</strong><br>
+        </div>
+        """, unsafe_allow_html=True)
+        for subscale, (score, interpretation) in report["psychometric"].items():
+            icon = SUBSCALE_ICONS.get(subscale, "•")
+            label = "Score" if subscale == psychometric_tests.TOTAL_SCALE else subscale
+            st.write(f"{icon} **{label}**: {score} ({interpretation})")
 
-    return analysis
+        # 4. Voice Analysis (may run on the worker pool)
+        if st.session_state.get("voice_job") is not None:
+            show_voice_results(st.session_state.voice_job, render_voice_results)
 
 
 # Main app
@@ -170,47 +209,33 @@ def main():
                 unsafe_allow_html=True,
             )
 
-    # Section 1: Color Picker
-    st.subheader("Color Mood Test")
-    st.markdown("""
-    <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
-    Emotion and sentiment representation based on color-mood associations. Color-emotion associations vary by culture and individual.
-    </div>
-    """, unsafe_allow_html=True)
-    color = st.color_picker("Select a color representing your mood", "#0000ff")
-
-    # Section 2: Text Analysis
-    st.subheader("Text Analysis")
-    st.markdown("""
-    <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
-    Ideal for analyzing the sentiment of the user's journal or free-form text input. Emotion analysis from text are based on 6 Ekman emotions.
-    </div>
-    """, unsafe_allow_html=True)
-    journal_text = st.text_area("Write about how you are feeling", height=100)
+    # Color and journal are submitted together, so filling them in does not
+    # rerun the whole script on every click
+    with st.form("mood_inputs", border=False):
+        # Section 1: Color Picker
+        st.subheader("Color Mood Test")
+        st.markdown("""
+        <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
+        Emotion and sentiment representation based on color-mood associations. Color-emotion associations vary by culture and individual.
+        </div>
+        """, unsafe_allow_html=True)
+        color = st.color_picker("Select a color representing your mood", "#0000ff")
+
+        # Section 2: Text Analysis
+        st.subheader("Text Analysis")
+        st.markdown("""
+        <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
+        Ideal for analyzing the sentiment of the user's journal or free-form text input. Emotion analysis from text are based on 6 Ekman emotions.
+        </div>
+        """, unsafe_allow_html=True)
+        journal_text = st.text_area("Write about how you are feeling", height=100)
+        sentiment_backend = st.radio("Sentiment engine", list(sentiment.SENTIMENT_BACKENDS), horizontal=True,
+                                     index=list(sentiment.SENTIMENT_BACKENDS).index(sentiment.DEFAULT_SENTIMENT_BACKEND))
+
+        st.form_submit_button("**Save color and journal**")
 
     # Section 3: Emotion Assessment
-    st.subheader("Emotion Assessment")
-    st.markdown("""
-    <div style="background:#55e4c530; color:#2f7163; text-align: center; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
-    Validated psychometric tests and assessment tools used to detect emotions, mental states, and mental health conditions. Useful to assess conditions like anxiety, depression, stress, and more.
-    </div>
-    """, unsafe_allow_html=True)
-    selected_test = st.selectbox("Select a test to take:", list(psychometric_tests.TESTS.keys()), index=7)
-
-    with st.container(border=True, height=400):
-        # Display the selected test
-        test_data = psychometric_tests.TESTS[selected_test]
-        # st.write(f"{selected_test}")
-
-        # Collect user responses
-        responses = []
-        for i, question in enumerate(test_data["questions"]):
-            response = st.radio(
-                f"{i + 1}. {question}",
-                options=test_data["options"],
-                key=f"q{i}"
-            )
-            responses.append(test_data["scoring"][test_data["options"].index(response)])
+    selected_test, adaptive, responses = questionnaire_section()
 
     # Section 4: Voice Analysis
     st.subheader("Voice Analysis")
@@ -269,111 +294,16 @@ def main():
 
     # Submit button
     if button2.button("**Analyze Mental State**", type="primary", disabled = not valid):  # disabled = not valid,
-        with st.container(border=True):
-            st.subheader("Emotion Analysis Results")
-            # Disclaimer
-            st.markdown("""
-            <div style="background:#EAEAED; padding:10px; border-radius:0px 0px 10px 10px; margin-bottom:20px">
-            <strong style="color:#ff4c4b">Note:</strong> This is not a medical diagnosis. Consult a professional for medical advice.
-            </div>
-            """, unsafe_allow_html=True)
-            results = []
-    
-            # 1. Color Analysis
-            color_hex = color.lstrip("#").lower()
-            simple_colors = {
-                "ff0000": "red",  # Red
-                "0000ff": "blue",  # Blue
-                "00ff00": "green",  # Green
-                "ffff00": "yellow",  # Yellow
-                "ffa500": "orange",  # Orange
-                "800080": "purple",  # Purple
-                "ffc0cb": "pink",  # Pink
-                "a52a2a": "brown",  # Brown
-                "000000": "black",  # Black
-                "ffffff": "white",  # White
-                "808080": "gray",  # Gray
-                "008080": "teal",  # Teal
-                "ff00ff": "magenta",  # Magenta
-                "e6e6fa": "lavender",  # Lavender
-                "ffd700": "gold",  # Gold
-                "c0c0c0": "silver",  # Silver
-                "40e0d0": "turquoise",  # Turquoise
-                "800000": "maroon",  # Maroon
-                "000080": "navy",  # Navy
-                "f5f5dc": "beige"  # Beige
-            }
-            nearest_color = find_nearest_color(color_hex, simple_colors)
-            color_mood = COLOR_MOOD_MAP.get(nearest_color, "Unknown")
-            st.markdown(f"""
-                <div>
-                🎨 <strong style="font-size:large">Color Mood Results: </strong>{color_mood}<br><br>
-                </div>
-                """, unsafe_allow_html=True)
-    
-            # 2. Text Analysis (TextBlob Only)
-            if journal_text:
-                text_blob = TextBlob(journal_text)
-                sentiment_polarity = text_blob.sentiment.polarity
-                sentiment_subjectivity = text_blob.sentiment.subjectivity
-    
-                sentiment_label = "Neutral"
-                if sentiment_polarity > 0.1:
-                    sentiment_label = "Positive"
-                elif sentiment_polarity < -0.1:
-                    sentiment_label = "Negative"
-    
-                st.markdown(f"""
-                <div>
-                📝 <strong style="font-size:large">Text Sentiment Results: </strong>{sentiment_label} (Polarity: {sentiment_polarity:.2f}, Subjectivity: {sentiment_subjectivity:.2f})<br>
-                </div>
-                """, unsafe_allow_html=True)
-    
-            # 3. Voice Analysis
-            if wav_audio_data is not None:
-                with open("temp_audio.wav", "wb") as f:
-                    f.write(wav_audio_data)
-                voice_analysis = analyze_voice("temp_audio.wav")
-    
-                if isinstance(voice_analysis, dict):
-                    results.append(f"🎤 **Voice Analysis**:")
-                    results.append(f"- Average pitch: {voice_analysis['mean_pitch_hz']} Hz")
-                    results.append(f"- Pitch variability: {voice_analysis['pitch_variability']} Hz")
-                    results.append(f"- Speech continuity: {voice_analysis['voiced_speech_percent']}% voiced")
-                    results.append("--- Emotional indicators:")
-                    for item in voice_analysis['interpretation']:
-                        results.append(f"  • {item.capitalize()}")
-                else:
-                    results.append(f"🎤 **Voice Analysis Results:** {voice_analysis}")
-    
-            # 4. Psychometric Test Analysis
-            # Calculate score and interpretation
-            if selected_test == "DASS-21 (Depression, Anxiety, and Stress Scale)":
-                results = psychometric_tests.calculate_score(selected_test, responses)
-                st.write(f"😔 **Depression**: {results['Depression'][0]} ({results['Depression'][1]})")
-                st.write(f"😟 **Anxiety:** {results['Anxiety'][0]} ({results['Anxiety'][1]})")
-                st.write(f"😫 **Stress**: {results['Stress'][0]} ({results['Stress'][1]})")
-            elif selected_test == "PANAS (Positive and Negative Affect Schedule)":
-                results = psychometric_tests.calculate_score(selected_test, responses)
-                st.write(f"😄 **Positive Affect**: {results['Positive Affect'][0]} ({results['Positive Affect'][1]})")
-                st.write(f"☹️ **Negative Affect**: {results['Negative Affect'][0]} ({results['Negative Affect'][1]})")
-            else:
-                interpretation = psychometric_tests.calculate_score(selected_test, responses)
-                st.markdown(f"""
-                <div>
-                😶 <strong style="font-size:large">Emotion Assessment Results:</strong><br>
-                </div>
-                """, unsafe_allow_html=True)
-    
-                st.markdown(f"""
-                <div>
-                {interpretation}<br>
-                </div>
-                """, unsafe_allow_html=True)
-    
-                # Show all results
-                st.markdown("\n\n".join(results))
+        st.session_state.report = analyze_inputs(color, journal_text, sentiment_backend, selected_test, responses, adaptive)
+        st.session_state.voice_job = None
+        if wav_audio_data is not None:
+            try:
+                st.session_state.voice_job = submit_voice_analysis(wav_audio_data)
+            except QueueFullError as e:
+                st.warning(str(e))
 
+    if st.session_state.get("report") is not None:
+        results_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+"""
+Streamlit components shared by app.py and stage2_app.py: the adaptive
+questionnaire, uniform scoring of full and adaptive responses, and the
+voice results that may still be pending on the worker pool.
+"""
+import streamlit as st
+
+import psychometric_tests
+
+
+def _record_adaptive_answer(answers, item, test_data, key):
+    answers[item] = test_data["scoring"][test_data["options"].index(st.session_state[key])]
+
+
+# A fragment, so each answer reruns only the questionnaire
+@st.fragment
+def adaptive_questionnaire(test_name, test_data, key_prefix):
+    """
+    Ask one question at a time until every subscale's result is certain.
+
+    Returns:
+        dict | None: {item index: item score} once finished, otherwise None.
+    """
+    answers = st.session_state.setdefault(f"{key_prefix}_answers", {}).setdefault(test_name, {})
+    item = psychometric_tests.next_adaptive_item(test_name, answers)
+    if item is None:
+        st.success(f"Done after {len(answers)} of {len(test_data['questions'])} questions.")
+        st.button("Start over", key=f"{key_prefix}_restart", on_click=answers.clear)
+        return answers
+
+    st.progress(len(answers) / len(test_data["questions"]))
+    key = f"{key_prefix}_{test_name}_{item}"
+    st.radio(
+        f"{item + 1}. {test_data['questions'][item]}",
+        options=test_data["options"],
+        index=None,
+        key=key,
+        on_change=_record_adaptive_answer,
+        args=(answers, item, test_data, key)
+    )
+    return None
+
+
+def score_responses(test_name, responses, adaptive):
+    """Uniform {subscale: (score, interpretation)}; adaptive scores may be a range."""
+    if not adaptive:
+        return psychometric_tests.calculate_score(test_name, responses)
+    bounds = psychometric_tests.score_bounds(test_name, responses or {})
+    return {
+        subscale: (low if low == high else f"{low}–{high}", interpretation or "Not yet determined")
+        for subscale, ((low, high), interpretation) in bounds.items()
+    }
+
+
+# Re-runs on its own every second while the worker pool works on the job, so
+# the rest of the page is not blocked. Once the job is done, one full rerun
+# renders the result through show_voice_results, which drops this fragment
+# and its timer.
+@st.fragment(run_every=1.0)
+def poll_voice_results():
+    job = st.session_state.get("voice_job")
+    if job is None or job.done():
+        st.rerun()
+    st.info("🎤 Voice analysis in progress...")
+
+
+def show_voice_results(job, render):
+    """
+    Show a voice analysis job's result, or poll until there is one.
+
+    Args:
+        job (concurrent.futures.Future): From ``submit_voice_analysis``.
+        render (callable): Draws the result of a finished ``job``.
+    """
+    if job.done():
+        render(job)
+    else:
+        poll_voice_results()
@@ -0,0 +1,150 @@
+"""
+Batch voice analysis for offline re-scoring.
+
+Analyzes every WAV file in the given directories, files or manifests on a
+process pool and streams one JSON line per file as soon as it finishes.
+Throughput and per-file latency are printed to stderr at the end.
+
+Usage:
+    python batch_voice.py recordings/ --output results.jsonl
+    python batch_voice.py manifest.txt --workers 8 --profile fast_speech
+
+A manifest is a text file with one WAV path per line, or a .jsonl file with
+a "path" field per line; relative paths are resolved against the manifest's
+directory.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# Tasks kept in flight per worker, so huge manifests are not queued up front
+TASKS_PER_WORKER = 4
+
+_worker_settings = {}
+
+
+def iter_inputs(sources, recursive=False):
+    """Yield WAV paths from directories, manifests and plain file arguments."""
+    for source in map(Path, sources):
+        if source.is_dir():
+            pattern = "**/*" if recursive else "*"
+            yield from sorted(p for p in source.glob(pattern) if p.suffix.lower() == ".wav")
+        elif source.suffix.lower() == ".wav":
+            yield source
+        else:
+            with open(source, encoding="utf-8") as manifest:
+                for line in manifest:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    path = Path(json.loads(line)["path"] if source.suffix.lower() == ".jsonl" else line)
+                    yield path if path.is_absolute() else source.parent / path
+
+
+def _init_worker(profile, backend, stream):
+    """Load the heavy imports once per worker and pay any JIT warm-up up front."""
+    import voice_analysis
+
+    _worker_settings.update(profile=profile, backend=backend, stream=stream)
+    voice_analysis.warm_up(profile, backend)
+
+
+def _analyze_file(path):
+    import voice_analysis
+
+    start = time.perf_counter()
+    try:
+        if _worker_settings["stream"]:
+            result = voice_analysis.analyze_voice_stream(path, profile=_worker_settings["profile"],
+                                                         backend=_worker_settings["backend"])
+        else:
+            with open(path, "rb") as f:
+                audio = f.read()
+            result = voice_analysis.analyze_voice(audio, profile=_worker_settings["profile"],
+                                                  backend=_worker_settings["backend"])
+        record = {"path": str(path), "result": result}
+    except Exception as e:
+        record = {"path": str(path), "error": f"{type(e).__name__}: {e}"}
+    record["latency_s"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def run(paths, output, workers, profile=None, backend=None, stream=False):
+    """
+    Analyze ``paths`` on a process pool, writing JSON lines to ``output``.
+
+    Returns:
+        list: Per-file latencies in seconds, and the number of failed files.
+    """
+    latencies = []
+    failures = 0
+    paths = iter(paths)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(profile, backend, stream)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * TASKS_PER_WORKER:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_analyze_file, path))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                latencies.append(record["latency_s"])
+                failures += "error" in record
+                output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    return latencies, failures
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze WAV recordings in parallel and write JSONL results.")
+    parser.add_argument("inputs", nargs="+", help="WAV files, directories, or manifests (.txt / .jsonl)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="worker processes (default: one per core)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    parser.add_argument("--profile", help="analysis profile (default: VOICE_ANALYSIS_PROFILE or 'full')")
+    parser.add_argument("--backend", help="pitch backend (default: VOICE_PITCH_BACKEND or 'yin')")
+    parser.add_argument("--stream", action="store_true", help="use bounded-memory streaming analysis for long files")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        latencies, failures = run(iter_inputs(args.inputs, args.recursive), output, args.workers,
+                                  args.profile, args.backend, args.stream)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print("No WAV files found.", file=sys.stderr)
+        return 1
+    print(f"{len(latencies)} files ({failures} failed) in {elapsed:.2f} s with {args.workers} workers: "
+          f"{len(latencies) / elapsed:.2f} files/s", file=sys.stderr)
+    print(f"Per-file latency: mean {sum(latencies) / len(latencies):.3f} s, "
+          f"p50 {_percentile(latencies, 0.5):.3f} s, p95 {_percentile(latencies, 0.95):.3f} s, "
+          f"max {max(latencies):.3f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
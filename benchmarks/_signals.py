@@ -0,0 +1,55 @@
+"""Synthetic test signals shared by the voice benchmarks."""
+import io
+import wave
+
+import numpy as np
+
+
+def synth_speech(duration=10.0, sr=44100, f0=140.0, seed=0):
+    """
+    Generate a speech-like signal: a harmonic source with a drifting pitch
+    contour and jitter, shaped into syllables separated by short pauses,
+    over a low noise floor.
+
+    Returns:
+        tuple: (y, f0_track) where ``f0_track`` is the true per-sample pitch
+        (0 during pauses).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    t = np.arange(n) / sr
+
+    contour = f0 * (1 + 0.15 * np.sin(2 * np.pi * 0.4 * t) + 0.05 * np.sin(2 * np.pi * 2.3 * t))
+    contour *= 1 + 0.005 * rng.standard_normal(n).cumsum() / np.sqrt(np.arange(1, n + 1))
+    phase = 2 * np.pi * np.cumsum(contour) / sr
+    source = sum(np.sin(k * phase) / k for k in range(1, 9))
+
+    # Syllables of 150-400 ms separated by 50-300 ms pauses
+    envelope = np.zeros(n)
+    pos = int(0.3 * sr)
+    while pos < n:
+        length = int(rng.uniform(0.15, 0.4) * sr)
+        end = min(pos + length, n)
+        envelope[pos:end] = np.hanning(length)[:end - pos]
+        pos = end + int(rng.uniform(0.05, 0.3) * sr)
+
+    y = 0.3 * source * envelope + 0.002 * rng.standard_normal(n)
+    return y.astype(np.float32), np.where(envelope > 0.1, contour, 0.0)
+
+
+def synth_tone(freq, duration=1.0, sr=16000, amplitude=0.5):
+    """A pure sine tone."""
+    t = np.arange(int(duration * sr)) / sr
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def to_wav_bytes(y, sr):
+    """Encode a float signal as 16-bit PCM WAV bytes, as the recorder does."""
+    pcm = (np.clip(y, -1, 1) * 32767).astype("<i2")
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        wav.writeframes(pcm.tobytes())
+    return out.getvalue()
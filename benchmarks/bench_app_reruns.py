@@ -0,0 +1,70 @@
+"""
+Full-script reruns and script time per completed assessment in a Streamlit app.
+
+The app is driven with Streamlit's AppTest the way a user fills it in:
+choose a test, pick a color, write the journal entry, answer every question,
+save each form, and press Validate. Changing a widget outside a form reruns
+the script; widgets inside a form only rerun it on submit.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_app_reruns [app.py ...]
+
+To compare with an earlier revision:
+    git show <rev>:app.py > /tmp/app_before.py
+    python -m benchmarks.bench_app_reruns /tmp/app_before.py app.py
+"""
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+TEST_NAME = "DASS-21 (Depression, Anxiety, and Stress Scale)"
+JOURNAL = "Today was long and tiring, but talking to a friend in the evening helped me feel calmer and more hopeful."
+
+
+def complete_assessment(path):
+    """Returns the script time of every rerun, the initial page load first."""
+    at = AppTest.from_file(os.path.abspath(path), default_timeout=120)
+    timings = []
+
+    def rerun():
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+
+    def change(widget, value):
+        widget.set_value(value)
+        if not widget.proto.form_id:
+            rerun()
+
+    rerun()
+    change(at.selectbox[0], TEST_NAME)
+    change(at.color_picker[0], "#ffd700")
+    change(at.text_area[0], JOURNAL)
+    for i in range(len(at.radio)):
+        change(at.radio[i], at.radio[i].options[1])
+    # Look each submit button up again, as the previous rerun rebuilt the tree
+    for label in [button.label for button in at.button if button.proto.is_form_submitter]:
+        next(button for button in at.button if button.label == label).click()
+        rerun()
+    next(button for button in at.button if "Validate" in button.label).click()
+    rerun()
+
+    if at.exception:
+        raise RuntimeError(f"{path}: {at.exception[0].value}")
+    return timings
+
+
+def main(paths):
+    paths = paths or ["app.py"]
+    print(f"{'app':<28}{'reruns':>8}{'median ms':>11}{'total ms':>10}")
+    for path in paths:
+        timings = complete_assessment(path)
+        reruns = timings[1:]
+        print(f"{path:<28}{len(reruns):>8}{statistics.median(reruns) * 1000:>11.1f}{sum(reruns) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
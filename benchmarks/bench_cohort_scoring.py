@@ -0,0 +1,68 @@
+"""
+Throughput of psychometric_tests.score_batch on a memory-mapped cohort,
+compared with calling calculate_score once per respondent.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cohort_scoring [rows] [test name]
+
+Random uint8 item scores for ``rows`` respondents (default 20 million) are
+written to a temporary .npy file and scored through ``np.load(mmap_mode="r")``.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import psychometric_tests
+
+DEFAULT_ROWS = 20_000_000
+DEFAULT_TEST = "DASS-21 (Depression, Anxiety, and Stress Scale)"
+LOOP_ROWS = 20_000
+
+
+def write_cohort(path, test_name, rows, seed=0):
+    """Write random item scores in chunks, so generating them is bounded too."""
+    test_data = psychometric_tests.TESTS[test_name]
+    scoring = np.array(test_data["scoring"], dtype=np.uint8)
+    cohort = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(rows, len(test_data["questions"])))
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, psychometric_tests.BATCH_CHUNK_ROWS):
+        chunk = cohort[start:start + psychometric_tests.BATCH_CHUNK_ROWS]
+        chunk[:] = scoring[rng.integers(0, len(scoring), chunk.shape)]
+    cohort.flush()
+    del cohort
+
+
+def main(argv):
+    rows = int(argv[0]) if argv else DEFAULT_ROWS
+    test_name = argv[1] if len(argv) > 1 else DEFAULT_TEST
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cohort.npy")
+        write_cohort(path, test_name, rows)
+        cohort = np.load(path, mmap_mode="r")
+
+        sample = [list(map(int, row)) for row in cohort[:LOOP_ROWS]]
+        start = time.perf_counter()
+        for row in sample:
+            psychometric_tests.calculate_score(test_name, row)
+        loop_rate = LOOP_ROWS / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = psychometric_tests.score_batch(test_name, cohort)
+        elapsed = time.perf_counter() - start
+        del cohort
+
+    print(f"{test_name}: {rows:,} respondents")
+    print(f"calculate_score loop  {loop_rate:>14,.0f} rows/s  (~{rows / loop_rate:.0f} s for the cohort)")
+    print(f"score_batch (mmap)    {rows / elapsed:>14,.0f} rows/s  ({elapsed:.2f} s)")
+    for name, result in results.items():
+        counts = np.bincount(result["bands"] + 1, minlength=len(result["labels"]) + 1)
+        bands = ", ".join(f"{label} {count / rows:.1%}" for label, count in zip(result["labels"], counts[1:]))
+        print(f"  {name}: mean {result['scores'].mean():.2f}; {bands}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+"""
+Cold start of the Streamlit apps: time to first render and an import profile.
+
+Each app is rendered once with Streamlit's AppTest in a fresh interpreter,
+as a new server process would. The time to first render is measured from
+launching the interpreter to the end of the first script run, and compared
+with an empty script (the floor set by Python and Streamlit themselves).
+A second run under ``python -X importtime`` records what the app imports on
+top of Streamlit, summed by top-level package.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cold_start [app.py ...]
+"""
+import collections
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Budget for the app's own share of the first render, on top of the empty script
+FIRST_RENDER_BUDGET_S = 0.5
+REPEATS = 3
+TOP_PACKAGES = 8
+
+MARKER = "-- first render --"
+RENDER = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+sys.stderr.write("{MARKER}\\n")
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+if at.exception:
+    sys.exit(at.exception[0].value)
+print("rendered", flush=True)
+"""
+
+
+def time_to_first_render(path):
+    """Seconds from starting the interpreter until the first run finishes."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", RENDER, path], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    if process.wait() or line.strip() != "rendered":
+        raise RuntimeError(f"{path} did not render")
+    return elapsed
+
+
+def import_profile(path):
+    """{top-level package: seconds} imported by the app beyond Streamlit's own imports."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", RENDER, path],
+                            capture_output=True, text=True, check=True)
+    lines = result.stderr.splitlines()
+    per_package = collections.Counter()
+    for line in lines[lines.index(MARKER) + 1:]:
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _, module = (field.strip() for field in line[len("import time:"):].split("|"))
+            per_package[module.split(".")[0]] += int(self_us) / 1e6
+    return per_package
+
+
+def main(paths):
+    paths = paths or ["app.py", "stage2_app.py"]
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = os.path.join(tmp, "empty_app.py")
+        with open(empty, "w") as f:
+            f.write("import streamlit as st\nst.write('')\n")
+        floor = statistics.median(time_to_first_render(empty) for _ in range(REPEATS))
+    print(f"empty Streamlit script: {floor:.2f} s to first render\n")
+
+    for path in paths:
+        path = os.path.abspath(path)
+        total = statistics.median(time_to_first_render(path) for _ in range(REPEATS))
+        own = total - floor
+        verdict = "within" if own <= FIRST_RENDER_BUDGET_S else "OVER"
+        print(f"{os.path.basename(path)}: {total:.2f} s to first render, {own:.2f} s for the app "
+              f"({verdict} the {FIRST_RENDER_BUDGET_S:.1f} s budget)")
+        profile = import_profile(path)
+        print(f"  imports beyond Streamlit: {sum(profile.values()):.2f} s")
+        for package, seconds in profile.most_common(TOP_PACKAGES):
+            print(f"    {package:<24}{seconds * 1000:>8.0f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
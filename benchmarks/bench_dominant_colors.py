@@ -0,0 +1,82 @@
+"""
+Latency of color_mood.dominant_colors on 12 MP photos against
+DOMINANT_COLOR_BUDGET_MS, on a single core.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_dominant_colors [photo.jpg ...]
+
+Without arguments a synthetic 4000x3000 photo is used. The budget applies
+to an already-decoded RGB image, which is what the app hands over; the
+encoded-JPEG case includes JPEG entropy decoding, which no downsampling can
+skip, and is reported for information. Files given on the command line are
+timed from their encoded bytes. Exits with status 1 if a budgeted case
+misses the budget.
+"""
+import io
+import os
+import statistics
+import sys
+import time
+
+# Hold the benchmark to one core, as the budget is stated for one
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import numpy as np
+from PIL import Image
+
+import color_mood
+
+REPEATS = 7
+
+
+def synthetic_photo(width=4000, height=3000, seed=0):
+    """Smooth color regions plus noise, so JPEG decoding does realistic work."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.stack([
+        128 + 100 * np.sin(x / 500 + 1.0),
+        128 + 100 * np.sin(y / 400 + 2.0),
+        128 + 100 * np.sin((x + y) / 700),
+    ], axis=-1)
+    image += rng.normal(0, 12, image.shape).astype(np.float32)
+    return Image.fromarray(np.clip(image, 0, 255).astype(np.uint8))
+
+
+def time_case(make_image):
+    timings = []
+    for _ in range(REPEATS):
+        image = make_image()
+        start = time.perf_counter()
+        result = color_mood.dominant_colors(image)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+def main(paths):
+    cases = []
+    if paths:
+        for path in paths:
+            data = open(path, "rb").read()
+            cases.append((os.path.basename(path), lambda data=data: Image.open(io.BytesIO(data)), False))
+    else:
+        photo = synthetic_photo()
+        encoded = io.BytesIO()
+        photo.save(encoded, format="JPEG", quality=90)
+        data = encoded.getvalue()
+        cases.append(("12 MP JPEG (decode included)", lambda: Image.open(io.BytesIO(data)), False))
+        cases.append(("12 MP decoded RGB", lambda: photo, True))
+
+    budget = color_mood.DOMINANT_COLOR_BUDGET_MS
+    failed = False
+    for name, make_image, budgeted in cases:
+        ms, result = time_case(make_image)
+        status = ("ok" if ms <= budget else "OVER BUDGET") if budgeted else "not budgeted"
+        failed |= budgeted and ms > budget
+        palette = ", ".join(f"{c['color']} {c['share']:.0%}" for c in result)
+        print(f"{name:<32}{ms:8.1f} ms  (budget {budget} ms, {status})  {palette}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""
+Latency of classifying every face in a photo: one call per face versus
+face_analysis.classify_faces, which batches the crops.
+
+Usage (from the repository root, with the model store populated):
+    python -m benchmarks.bench_face_batching [image ...]
+
+Face crops are cut at random from the given photos, or from synthetic ones
+without arguments, at sizes typical of faces in group photos. For 1-32 faces
+the benchmark reports the best of ``REPEATS`` runs of each approach and
+checks that both give every face the same predictions.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+import face_analysis
+import model_store
+
+FACE_COUNTS = (1, 2, 4, 8, 16, 32)
+REPEATS = 3
+SCORE_TOLERANCE = 1e-4
+
+
+def synthetic_photos(n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    # Smooth random fields, so crops are not pure noise
+    return [Image.fromarray(rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)).resize((1600, 1200), Image.BICUBIC)
+            for _ in range(n)]
+
+
+def random_crops(photos, n, seed=0):
+    rng = random.Random(seed)
+    crops = []
+    for _ in range(n):
+        photo = rng.choice(photos)
+        side = rng.randint(60, min(photo.size) // 3)
+        x, y = rng.randint(0, photo.width - side), rng.randint(0, photo.height - side)
+        crops.append(photo.crop((x, y, x + side, y + int(side * 1.2))))
+    return crops
+
+
+def best_time(run):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_predictions(a, b):
+    return all(
+        [p["label"] for p in x] == [p["label"] for p in y]
+        and max(abs(p["score"] - q["score"]) for p, q in zip(x, y)) <= SCORE_TOLERANCE
+        for x, y in zip(a, b)
+    )
+
+
+def main(paths):
+    photos = [Image.open(path).convert("RGB") for path in paths] or synthetic_photos()
+    classifier = model_store.get_pipeline("emotion_classifier")
+    face_analysis.classify_faces(random_crops(photos, 2))  # warm-up
+
+    print(f"batch size limit {face_analysis.FACE_BATCH_SIZE} (FACE_BATCH_SIZE)")
+    print(f"{'faces':>5}{'per face ms':>13}{'batched ms':>12}{'speedup':>9}  same output")
+    for count in FACE_COUNTS:
+        crops = random_crops(photos, count, seed=count)
+        loop_time, looped = best_time(lambda: [classifier(face) for face in crops])
+        batch_time, batched = best_time(lambda: face_analysis.classify_faces(crops))
+        print(f"{count:>5}{loop_time * 1000:>13.0f}{batch_time * 1000:>12.0f}{loop_time / batch_time:>8.1f}x"
+              f"  {'yes' if same_predictions(looped, batched) else 'NO'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,108 @@
+"""
+Face detector backends compared on a local image set.
+
+Usage (from the repository root, with the model store populated):
+    python -m benchmarks.bench_face_detectors images/ [backend ...]
+
+Every .jpg/.jpeg/.png under ``images/`` is used. Photos may be sorted into
+folders named after the expected emotion (e.g. ``images/happy/1.jpg``);
+folder names that match one of the classifier's labels (ignoring case) make
+the photo count towards downstream accuracy. For each backend the benchmark
+reports:
+
+- detection latency per photo (median and 95th percentile, after a warm-up);
+- the share of photos with at least one detection;
+- crop shape: median height/width ratio (faces are roughly 1.0-1.4, whole
+  people 2 or more) and median share of the photo's area;
+- accuracy of the classifier's top label for the largest detected face,
+  with photos without a detection counted as wrong.
+
+The classifier on the whole photo, with no detector, is reported as a
+reference.
+"""
+import math
+import os
+import statistics
+import sys
+import time
+
+import face_analysis
+import model_store
+
+EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_image_set(root):
+    """[(path, expected label or None, photo)] for every image under ``root``."""
+    labels = {label.lower() for label in model_store.get_pipeline("emotion_classifier").model.config.id2label.values()}
+    images = []
+    for directory, _, files in sorted(os.walk(root)):
+        folder = os.path.basename(directory).lower()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                photo, _ = face_analysis.load_photo(os.path.join(directory, name))
+                images.append((os.path.join(directory, name), folder if folder in labels else None, photo))
+    return images
+
+
+def accuracy(predictions, expected):
+    pairs = [(p, e) for p, e in zip(predictions, expected) if e is not None]
+    if not pairs:
+        return "n/a"
+    return f"{sum(p is not None and p.lower() == e for p, e in pairs) / len(pairs):.1%} of {len(pairs)}"
+
+
+def evaluate(backend, images):
+    face_analysis.detect_faces(images[0][2], backend=backend)  # warm-up: model or cascade loading
+    latencies, ratios, shares, predictions = [], [], [], []
+    for _, _, photo in images:
+        start = time.perf_counter()
+        boxes = face_analysis.detect_faces(photo, backend=backend)
+        latencies.append(time.perf_counter() - start)
+        for xmin, ymin, xmax, ymax in boxes:
+            ratios.append((ymax - ymin) / max(1, xmax - xmin))
+            shares.append((xmax - xmin) * (ymax - ymin) / (photo.width * photo.height))
+        if boxes:
+            largest = max(boxes, key=lambda box: (box[2] - box[0]) * (box[3] - box[1]))
+            predictions.append(face_analysis.classify_faces([photo.crop(largest)])[0][0]["label"])
+        else:
+            predictions.append(None)
+    return {
+        "latency": latencies,
+        "detected": sum(p is not None for p in predictions) / len(images),
+        "ratio": statistics.median(ratios) if ratios else None,
+        "share": statistics.median(shares) if shares else None,
+        "predictions": predictions
+    }
+
+
+def main(argv):
+    if not argv or not os.path.isdir(argv[0]):
+        sys.exit(__doc__)
+    backends = argv[1:] or list(face_analysis.FACE_DETECTORS)
+    images = load_image_set(argv[0])
+    if not images:
+        sys.exit(f"No images found under {argv[0]}")
+    expected = [label for _, label, _ in images]
+    print(f"{len(images)} photos, {sum(e is not None for e in expected)} with an expected emotion\n")
+
+    print(f"{'detector':<10}{'median ms':>10}{'p95 ms':>8}{'detected':>10}{'h/w':>6}{'area':>7}  accuracy")
+    for backend in backends:
+        missing = face_analysis.missing_models(backend)
+        if missing:
+            print(f"{backend:<10}skipped: {', '.join(missing)} not in {model_store.MODEL_DIR}")
+            continue
+        result = evaluate(backend, images)
+        latency = sorted(result["latency"])
+        shape = (f"{result['ratio']:>6.2f}{result['share']:>7.1%}" if result["ratio"] is not None
+                 else f"{'-':>6}{'-':>7}")
+        print(f"{backend:<10}{statistics.median(latency) * 1000:>10.0f}"
+              f"{latency[math.ceil(0.95 * len(latency)) - 1] * 1000:>8.0f}{result['detected']:>10.0%}"
+              f"{shape}  {accuracy(result['predictions'], expected)}")
+
+    whole = [prediction[0]["label"] for prediction in face_analysis.classify_faces([photo for _, _, photo in images])]
+    print(f"{'no detector (whole photo)':<51}  {accuracy(whole, expected)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,111 @@
+"""
+Cold and warm load times of the stage 2 models from the local model store.
+
+Usage (from the repository root, with the store populated; see model_store):
+    python -m benchmarks.bench_model_store [image]
+
+Every measurement runs in a fresh interpreter, as a new server process
+would. "cold" first evicts the weight files from the OS page cache, so they
+are read from disk; "warm" finds them cached, which is the case for every
+server process after the first. Each run reports the torch/transformers
+import, the first and a repeated ``get_pipeline`` per model, a first call
+on the image (a synthetic one without an argument), and how much resident
+memory the models add as file-backed pages (weights shared through the page
+cache) versus private memory.
+"""
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import model_store
+
+
+def _rss_mb():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f if line.startswith("Rss"))
+    return {key: int(value.split()[0]) / 1024 for key, value in fields.items()}
+
+
+def measure_process(image_path):
+    """Timings in one process; run through a subprocess by ``main``."""
+    from PIL import Image
+
+    image = Image.open(image_path).convert("RGB") if image_path else Image.new("RGB", (640, 480), (150, 110, 90))
+    timings, memory = {}, {}
+
+    start = time.perf_counter()
+    import torch  # noqa: F401
+    import transformers
+    transformers.pipeline  # resolve the lazily imported module too
+    timings["import torch + transformers"] = time.perf_counter() - start
+    before = _rss_mb()
+    for name in model_store.MODELS:
+        start = time.perf_counter()
+        model_store.get_pipeline(name)
+        timings[f"load {name}"] = time.perf_counter() - start
+        start = time.perf_counter()
+        model_store.get_pipeline(name)
+        timings[f"get {name} again"] = time.perf_counter() - start
+    loaded = _rss_mb()
+    for name in model_store.MODELS:
+        start = time.perf_counter()
+        model_store.get_pipeline(name)(image)
+        timings[f"first {name} call"] = time.perf_counter() - start
+
+    after = _rss_mb()
+    for kind in ("RssAnon", "RssFile"):
+        memory[f"{kind} after loading"] = loaded[kind] - before[kind]
+        memory[f"{kind} after first calls"] = after[kind] - before[kind]
+    return {"timings": timings, "rss_mb": memory}
+
+
+def evict_from_page_cache(paths):
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def run_process(image_path):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "benchmarks.bench_model_store", "--child", image_path or ""],
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.splitlines()[-1])
+    report["timings"]["process total"] = time.perf_counter() - start
+    return report
+
+
+def main(argv):
+    if argv[:1] == ["--child"]:
+        print(json.dumps(measure_process(argv[1] if len(argv) > 1 else None)))
+        return
+    missing = [name for name in model_store.MODELS if not model_store.is_available(name)]
+    if missing:
+        sys.exit(f"Not in {model_store.MODEL_DIR}: {', '.join(missing)}. Run `python model_store.py fetch` first.")
+    image_path = argv[0] if argv else None
+
+    weights = [path for name in model_store.MODELS
+               for path in glob.glob(os.path.join(model_store.model_path(name), "*.safetensors"))]
+    size_mb = sum(os.path.getsize(path) for path in weights) / 2 ** 20
+    print(f"{len(weights)} weight files, {size_mb:.0f} MB in {model_store.MODEL_DIR}\n")
+
+    evict_from_page_cache(weights)
+    cold = run_process(image_path)
+    warm = run_process(image_path)
+
+    print(f"{'':<34}{'cold':>10}{'warm':>10}")
+    for step in cold["timings"]:
+        print(f"{step:<34}{cold['timings'][step] * 1000:>8.0f}ms{warm['timings'][step] * 1000:>8.0f}ms")
+    print("\nmemory added by the models (private RssAnon, file-backed RssFile)")
+    for step in cold["rss_mb"]:
+        print(f"{step:<34}{cold['rss_mb'][step]:>8.0f}MB{warm['rss_mb'][step]:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
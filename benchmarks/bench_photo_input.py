@@ -0,0 +1,131 @@
+"""
+Photo input stage of the face analysis at increasing camera resolutions:
+full-resolution decode and detection (the previous behaviour) versus
+face_analysis.load_photo and resolution-capped detection.
+
+Usage (from the repository root, with the model store populated):
+    python -m benchmarks.bench_photo_input [photo.jpg ...]
+
+Without arguments, synthetic JPEGs of 2-48 megapixels are written to a
+temporary directory. For each photo the benchmark reports decode time, the
+size of the decoded image held per upload, the detector's preprocessing
+time (the part of detection that depends on resolution) and the whole
+detection time (best of ``REPEATS``), and checks that the capped path
+reports the same faces at positions within ``POSITION_TOLERANCE`` of the
+original photo's width. A stub detector that reports known faces at fixed
+fractions of whatever image it is given checks that the capped path maps
+them back to the same fractions of the original photo; the benchmark exits
+with status 1 if it does not.
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+import face_analysis
+import model_store
+
+SIZES = ((1600, 1200), (4000, 3000), (6000, 4000), (8000, 6000))
+REPEATS = 3
+POSITION_TOLERANCE = 0.01
+# (xmin, ymin, xmax, ymax) of the stub detector's faces, as fractions of the image size
+STUB_FACES = ((0.1, 0.2, 0.25, 0.45), (0.6, 0.3, 0.8, 0.7))
+
+
+def write_photo(path, size, seed=0):
+    rng = np.random.default_rng(seed)
+    field = Image.fromarray(rng.integers(0, 256, (24, 32, 3), dtype=np.uint8))
+    field.resize(size, Image.BICUBIC).save(path, quality=90)
+
+
+def best_time(run):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def full_resolution(path):
+    image = Image.open(path).convert("RGB")
+    return image, image.size
+
+
+def detect(image, original_size, max_side, backend=None):
+    """Face boxes in original coordinates, as detect_and_analyze_faces reports them."""
+    scale_x, scale_y = original_size[0] / image.width, original_size[1] / image.height
+    return [(xmin * scale_x, ymin * scale_y, xmax * scale_x, ymax * scale_y)
+            for xmin, ymin, xmax, ymax in face_analysis.detect_faces(image, max_side, backend)]
+
+
+def stub_faces(image, size):
+    """``STUB_FACES`` in the coordinates of an image of ``size``."""
+    width, height = size
+    return [(xmin * width, ymin * height, xmax * width, ymax * height) for xmin, ymin, xmax, ymax in STUB_FACES]
+
+
+def remaps_stub_faces(photo, original_size):
+    """Whether faces found on the capped detection image land where they are in the original photo."""
+    with mock.patch.dict(face_analysis.FACE_DETECTORS, stub=lambda image: stub_faces(image, image.size)):
+        found = detect(photo, original_size, face_analysis.DETECTION_MAX_SIDE, "stub")
+    return same_faces(stub_faces(None, original_size), found, original_size[0])
+
+
+def same_faces(a, b, width):
+    return len(a) == len(b) and all(
+        max(abs(p - q) for p, q in zip(box_a, box_b)) <= POSITION_TOLERANCE * width for box_a, box_b in zip(a, b))
+
+
+def preprocess(image, max_side):
+    """The detector's own resize and normalization, the part of detection that grows with resolution."""
+    processor = model_store.get_pipeline("face_detector").image_processor
+    return processor(images=face_analysis._capped(image, max_side), return_tensors="pt")
+
+
+def run(path):
+    width, height = Image.open(path).size
+    full_decode, (full_image, _) = best_time(lambda: full_resolution(path))
+    capped_decode, (photo, original_size) = best_time(lambda: face_analysis.load_photo(path))
+    full_prep, _ = best_time(lambda: preprocess(full_image, max(full_image.size)))
+    capped_prep, _ = best_time(lambda: preprocess(photo, face_analysis.DETECTION_MAX_SIDE))
+    full_detect, full_faces = best_time(lambda: detect(full_image, original_size, max(full_image.size)))
+    capped_detect, capped_faces = best_time(lambda: detect(photo, original_size, face_analysis.DETECTION_MAX_SIDE))
+    remapped = remaps_stub_faces(photo, original_size)
+    print(f"{os.path.basename(path)}: {width}x{height} ({width * height / 1e6:.0f} MP), "
+          f"{len(full_faces)} face(s), same faces: {'yes' if same_faces(full_faces, capped_faces, width) else 'NO'}, "
+          f"stub faces remapped: {'yes' if remapped else 'NO'}")
+    for label, decode, image, prep, detect_time in (
+            ("full resolution", full_decode, full_image, full_prep, full_detect),
+            ("capped", capped_decode, photo, capped_prep, capped_detect)):
+        print(f"  {label:<16} decode {decode * 1000:>5.0f} ms  {image.width:>4}x{image.height:<4} "
+              f"({image.width * image.height * 3 / 2 ** 20:>5.1f} MB)  "
+              f"preprocess {prep * 1000:>5.0f} ms  detect {detect_time * 1000:>5.0f} ms")
+    return remapped
+
+
+def main(paths):
+    missing = face_analysis.missing_models("detr")
+    if missing:
+        sys.exit(f"Not in {model_store.MODEL_DIR}: {', '.join(missing)}. Run `python model_store.py fetch` first.")
+    model_store.get_pipeline("face_detector")
+    failures = []
+    if paths:
+        failures = [path for path in paths if not run(path)]
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in SIZES:
+                path = os.path.join(tmp, f"photo_{size[0]}x{size[1]}.jpg")
+                write_photo(path, size)
+                if not run(path):
+                    failures.append(os.path.basename(path))
+    if failures:
+        sys.exit(f"Stub faces were not remapped to original coordinates for: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,121 @@
+"""
+Compare the pitch backends: cold-start cost, warm latency of analyze_voice,
+and per-frame accuracy on synthetic tones and speech-like signals with a
+known F0 track. Recorded WAVs given on the command line are compared
+against the "yin" backend, since they have no ground truth.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pitch_backends [recording.wav ...]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+import librosa
+import numpy as np
+
+import voice_analysis
+from benchmarks._signals import synth_speech, synth_tone
+
+REPEATS = 5
+GROSS_ERROR_CENTS = 350  # more than ~20% off counts as a gross pitch error
+
+COLD_START = """
+import time
+start = time.perf_counter()
+import voice_analysis
+from benchmarks._signals import synth_speech
+y, _ = synth_speech(5.0, 16000)
+voice_analysis.analyze_voice(y, sr=16000, backend="{backend}")
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(backend):
+    """Import plus first analysis in a fresh interpreter (includes any JIT warm-up)."""
+    out = subprocess.run([sys.executable, "-c", COLD_START.format(backend=backend)],
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def warm_latency(y, sr, profile, backend):
+    voice_analysis.analyze_voice(y, sr=sr, profile=profile, backend=backend)
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        voice_analysis.analyze_voice(y, sr=sr, profile=profile, backend=backend)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def frame_truth(f0_samples, n_frames, frame_length):
+    """Ground-truth F0 at the centre of each frame."""
+    hop = frame_length // 4
+    centres = np.arange(n_frames) * hop + frame_length // 2
+    return f0_samples[np.minimum(centres, len(f0_samples) - 1)]
+
+
+def cents_errors(estimate, truth):
+    valid = np.isfinite(estimate) & (truth > 0)
+    return np.abs(1200 * np.log2(estimate[valid] / truth[valid]))
+
+
+def report_accuracy(label, errors):
+    if len(errors) == 0:
+        print(f"  {label:<34} no voiced frames")
+        return
+    gross = np.mean(errors > GROSS_ERROR_CENTS) * 100
+    fine = errors[errors <= GROSS_ERROR_CENTS]
+    print(f"  {label:<34} frames {len(errors):>6}  gross errors {gross:5.1f}%  "
+          f"mean fine error {np.mean(fine) if len(fine) else float('nan'):5.1f} cents")
+
+
+def main(paths):
+    backends = list(voice_analysis.PITCH_BACKENDS)
+
+    print("Cold start (import + first 5 s analysis, fresh process):")
+    for backend in backends:
+        print(f"  {backend:<6}{cold_start(backend) * 1000:>9.1f} ms")
+
+    print("\nWarm analyze_voice latency, 30 s synthetic speech (median of %d):" % REPEATS)
+    for sr in (44100, 16000):
+        y, _ = synth_speech(30.0, sr)
+        for profile in voice_analysis.ANALYSIS_PROFILES:
+            cells = "".join(f"{backend}: {warm_latency(y, sr, profile, backend) * 1000:7.1f} ms   " for backend in backends)
+            print(f"  {sr:>6} Hz  {profile:<12} {cells}")
+
+    for profile, settings in voice_analysis.ANALYSIS_PROFILES.items():
+        sr = settings["sr"] or 44100
+        print(f"\nAccuracy, profile '{profile}' at {sr} Hz:")
+        for backend in backends:
+            tone_errors = []
+            for freq in np.geomspace(max(settings["fmin"] * 1.2, 65), min(settings["fmax"] * 0.8, 600), 12):
+                y = synth_tone(freq, 1.0, sr)
+                f0 = voice_analysis.track_pitch(y, sr, profile, backend)
+                tone_errors.append(cents_errors(f0, np.full(len(f0), freq)))
+            report_accuracy(f"{backend} / tones", np.concatenate(tone_errors))
+
+            speech_errors = []
+            for seed, base in enumerate((95.0, 140.0, 210.0)):
+                y, truth = synth_speech(10.0, sr, f0=base, seed=seed)
+                f0 = voice_analysis.track_pitch(y, sr, profile, backend)
+                speech_errors.append(cents_errors(f0, frame_truth(truth, len(f0), settings["frame_length"])))
+            report_accuracy(f"{backend} / synthetic speech", np.concatenate(speech_errors))
+
+    for path in paths:
+        y, sr = voice_analysis.decode_wav(open(path, "rb").read())
+        print(f"\nAgreement with yin on {path} ({sr} Hz):")
+        for profile, settings in voice_analysis.ANALYSIS_PROFILES.items():
+            target_sr = settings["sr"] or sr
+            signal = librosa.resample(y, orig_sr=sr, target_sr=target_sr) if target_sr != sr else y
+            reference = voice_analysis.track_pitch(signal, target_sr, profile, "yin")
+            reference = np.nan_to_num(reference, nan=0.0)
+            for backend in backends:
+                if backend != "yin":
+                    f0 = voice_analysis.track_pitch(signal, target_sr, profile, backend)
+                    report_accuracy(f"{profile} / {backend}", cents_errors(f0, reference))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+"""
+Accuracy versus latency of the int8 execution mode of the stage 2 models.
+
+Usage (from the repository root, with the model store populated):
+    python -m benchmarks.bench_quantization [images/]
+
+Both pipelines are loaded at fp32 and at int8 (see model_store) and run on
+the same inputs: the photos under ``images/`` (laid out as for
+bench_face_detectors) with the largest Haar face of each as the classifier's
+crop, or synthetic photos and crops without an argument. Reported per
+precision:
+
+- latency: classifier ms per face in one batched call, detector ms per photo
+  (best of bench_face_batching's ``REPEATS``);
+- agreement with fp32: the classifier's top label and largest probability
+  difference over all classes, and the detector's per-query top class and
+  largest box coordinate difference (relative to the image size);
+- classifier accuracy on the labelled photos, if there are any.
+
+TORCH_NUM_THREADS applies as in the app; the thread count used is printed.
+"""
+import sys
+
+import face_analysis
+import model_store
+from benchmarks.bench_face_batching import best_time, random_crops, synthetic_photos
+from benchmarks.bench_face_detectors import accuracy, load_image_set
+
+SYNTHETIC_FACES = 16
+
+
+def class_probabilities(classifier, crops):
+    """(N, classes) probabilities in label order, from one batched call."""
+    import numpy as np
+
+    labels = list(classifier.model.config.id2label.values())
+    results = classifier(crops, batch_size=len(crops), top_k=len(labels))
+    return np.array([[{p["label"]: p["score"] for p in result}[label] for label in labels] for result in results]), labels
+
+
+def detector_outputs(detector, photos):
+    """Per-query class logits and normalized boxes, straight from the model."""
+    import torch
+
+    logits, boxes = [], []
+    with torch.inference_mode():
+        for photo in photos:
+            outputs = detector.model(**detector.image_processor(images=photo, return_tensors="pt"))
+            logits.append(outputs.logits[0].numpy())
+            boxes.append(outputs.pred_boxes[0].numpy())
+    return logits, boxes
+
+
+def main(argv):
+    import numpy as np
+    import torch
+
+    if argv:
+        images = load_image_set(argv[0])
+        photos = [photo for _, _, photo in images]
+        expected = [label for _, label, _ in images]
+        crops = []
+        for photo in photos:
+            boxes = face_analysis.detect_faces(photo, backend="haar")
+            largest = max(boxes, key=lambda box: (box[2] - box[0]) * (box[3] - box[1]), default=None)
+            crops.append(photo.crop(largest) if largest else photo)
+    else:
+        photos = synthetic_photos()
+        crops = random_crops(photos, SYNTHETIC_FACES)
+        expected = [None] * len(crops)
+        photos = [face_analysis._capped(photo, face_analysis.DETECTION_MAX_SIDE) for photo in photos]
+
+    results = {}
+    for precision in model_store.PRECISIONS:
+        classifier = model_store.get_pipeline("emotion_classifier", precision)
+        detector = model_store.get_pipeline("face_detector", precision)
+        classifier(crops[:1])  # warm-up
+        classify_time, (probabilities, labels) = best_time(lambda: class_probabilities(classifier, crops))
+        detect_time, _ = best_time(lambda: [detector(photo) for photo in photos])
+        logits, boxes = detector_outputs(detector, photos)
+        results[precision] = {
+            "classify_ms": classify_time * 1000 / len(crops), "detect_ms": detect_time * 1000 / len(photos),
+            "probabilities": probabilities, "labels": labels, "logits": logits, "boxes": boxes
+        }
+
+    print(f"{len(crops)} face crops, {len(photos)} photos, {torch.get_num_threads()} intra-op thread(s)\n")
+    print(f"{'precision':<10}{'classify ms/face':>17}{'detect ms/photo':>16}{'top-1 agree':>13}{'max |dp|':>10}"
+          f"{'query agree':>13}{'max |dbox|':>12}  accuracy")
+    reference = results["fp32"]
+    for precision, result in results.items():
+        top1 = np.mean(result["probabilities"].argmax(1) == reference["probabilities"].argmax(1))
+        dp = np.abs(result["probabilities"] - reference["probabilities"]).max()
+        queries = np.mean(np.concatenate([a.argmax(-1) == b.argmax(-1)
+                                          for a, b in zip(result["logits"], reference["logits"])]))
+        dbox = max(np.abs(a - b).max() for a, b in zip(result["boxes"], reference["boxes"]))
+        predicted = [result["labels"][i] for i in result["probabilities"].argmax(1)]
+        print(f"{precision:<10}{result['classify_ms']:>17.0f}{result['detect_ms']:>16.0f}{top1:>13.1%}{dp:>10.4f}"
+              f"{queries:>13.1%}{dbox:>12.4f}  {accuracy(predicted, expected)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
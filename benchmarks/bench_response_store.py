@@ -0,0 +1,94 @@
+"""
+Round trip, size and speed of response_store's bit-packed response files.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_response_store [rows]
+
+For every test, random option indices for ``rows`` respondents (default
+1 million) are appended to a temporary file in uneven batches, so blocks
+end mid-byte, and read back. The benchmark reports bytes per response
+against one uint8 per answer and the write and read times, and checks that:
+
+- every response reads back unchanged;
+- rewording a question keeps the file readable;
+- a new test version, or a changed structure under the same version, is
+  rejected.
+
+It exits with status 1 if any check fails.
+"""
+import copy
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+import psychometric_tests
+import response_store
+
+DEFAULT_ROWS = 1_000_000
+BATCHES = 7
+
+
+def round_trip(path, test_name, options):
+    start = time.perf_counter()
+    with response_store.ResponseWriter(path, test_name) as writer:
+        for batch in np.array_split(options, BATCHES):
+            writer.append(batch)
+    written = time.perf_counter() - start
+    start = time.perf_counter()
+    recorded, read_back = response_store.read_options(path)
+    read = time.perf_counter() - start
+    return written, read, recorded == test_name and np.array_equal(read_back, options)
+
+
+def readable_with(path, test_name, change):
+    """Whether ``path`` still decodes once ``change`` has been applied to a copy of the test."""
+    tests = copy.deepcopy(psychometric_tests.TESTS)
+    change(tests[test_name])
+    with mock.patch.object(psychometric_tests, "TESTS", tests):
+        try:
+            response_store.read_options(path)
+        except ValueError:
+            return False
+    return True
+
+
+def main(argv):
+    rows = int(argv[0]) if argv else DEFAULT_ROWS
+    rng = np.random.default_rng(0)
+    failures = []
+
+    print(f"{'test':<50}{'bits':>5}{'bytes/resp':>11}{'vs uint8':>9}{'write ms':>10}{'read ms':>9}  round trip")
+    with tempfile.TemporaryDirectory() as directory:
+        for test_name, test_data in psychometric_tests.TESTS.items():
+            path = os.path.join(directory, "responses.psyr")
+            if os.path.exists(path):
+                os.remove(path)
+            options = rng.integers(0, len(test_data["options"]), (rows, len(test_data["questions"])), dtype=np.uint8)
+            written, read, same = round_trip(path, test_name, options)
+            if not same:
+                failures.append(f"{test_name}: responses changed in the round trip")
+            size = os.path.getsize(path) / rows
+            print(f"{test_name:<50}{response_store.bits_per_answer(len(test_data['options'])):>5}{size:>11.2f}"
+                  f"{size / options.shape[1]:>9.0%}{written * 1000:>10.0f}{read * 1000:>9.0f}  {'ok' if same else 'FAILED'}")
+
+            expectations = {
+                "reworded question": (lambda test: test["questions"].__setitem__(0, test["questions"][0] + "?"), True),
+                "new version": (lambda test: test.__setitem__("version", test["version"] + 1), False),
+                "reordered scoring": (lambda test: test["scoring"].reverse(), False),
+                "dropped question": (lambda test: test["questions"].pop(), False),
+            }
+            for change, (apply, readable) in expectations.items():
+                if readable_with(path, test_name, apply) != readable:
+                    failures.append(f"{test_name}: a file is {'not ' if readable else ''}readable after a {change}")
+
+    if failures:
+        sys.exit("\n".join(failures))
+    print("\nheader checks: ok")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
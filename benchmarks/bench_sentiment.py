@@ -0,0 +1,145 @@
+"""
+Throughput and agreement of the sentiment backends on journal-style text.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sentiment [entries.txt]
+
+A file argument is read as one journal entry per line. Without one, entries
+are assembled from a bank of journal-style sentences. Reports texts/s for
+TextBlob, nltk's own VADER analyzer and the ``vader`` backend, how closely
+the backend reproduces nltk's VADER scores (which differ only where
+nltk reuses a repeated word's first position), and how well its polarity and
+subjectivity agree with TextBlob's, including the Positive / Neutral /
+Negative label the app derives from polarity. nltk's analyzer is given the
+lexicon that ships with the app, so no nltk data needs to be downloaded.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+import sentiment
+
+ENTRIES = 2000
+REPEATS = 3
+
+SENTENCES = [
+    "Today was long and tiring, but talking to a friend in the evening helped.",
+    "I feel calm and hopeful about the coming week.",
+    "Work was stressful and I could not focus on anything.",
+    "I am really proud of how I handled the meeting.",
+    "Nothing seems to go right lately.",
+    "I slept badly again and woke up anxious.",
+    "The walk in the park was lovely and peaceful.",
+    "I'm not sure how I feel about the news.",
+    "My sister called and we laughed for an hour!",
+    "I keep worrying that I will disappoint everyone.",
+    "Honestly, it was not a bad day at all.",
+    "I felt lonely at dinner even though people were around.",
+    "Exercise helped a little, but I am still exhausted.",
+    "I am so grateful for my friends.",
+    "The deadline is tomorrow and I am completely overwhelmed.",
+    "I cooked a new recipe and it turned out great.",
+    "I was angry at myself for snapping at my partner.",
+    "Things are okay, nothing special happened.",
+    "I finally finished the project and I feel relieved.",
+    "Why does everything feel so heavy these days??",
+    "I had a productive morning and a quiet afternoon.",
+    "I cried for no reason this evening.",
+    "The weather was gray and I stayed inside all day.",
+    "I am excited about the trip next month!",
+    "I don't think anyone understands what I am going through.",
+    "Meditation made me feel a bit more centered.",
+    "I'm hardly sleeping and I feel restless.",
+    "It was a good day, honestly one of the best in weeks.",
+    "I felt ignored in the group chat.",
+    "I am trying to be patient with myself.",
+    "My manager praised my work, which was nice.",
+    "I feel numb, like nothing matters.",
+    "Spent the day reading and drinking tea.",
+    "I'm worried about my exams but I studied hard.",
+    "The kids made me smile when I got home.",
+    "I had a panic attack on the bus.",
+    "Everything went smoothly and I feel content.",
+    "I am frustrated that I keep procrastinating.",
+    "We went to the beach and the sunset was beautiful.",
+    "I wish I could just sleep for a week."
+]
+
+
+def journal_entries(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(SENTENCES, k=rng.randint(3, 8))) for _ in range(n)]
+
+
+def throughput(score, texts):
+    """Best of ``REPEATS`` passes, in texts/s, and the results."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = [score(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best, results
+
+
+def reference_analyzer():
+    """nltk's VADER analyzer over ``sentiment.VADER_LEXICON_PATH`` instead of nltk's downloaded copy."""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    class ShippedLexiconAnalyzer(SentimentIntensityAnalyzer):
+        def __init__(self):
+            with open(sentiment.VADER_LEXICON_PATH, encoding="utf-8") as f:
+                self.lexicon_file = f.read().rstrip("\n")
+            self.lexicon = self.make_lex_dict()
+            self.constants = VaderConstants()
+
+    return ShippedLexiconAnalyzer()
+
+
+def label(polarity):
+    return np.where(polarity > 0.1, 1, np.where(polarity < -0.1, -1, 0))
+
+
+def main(argv):
+    if argv:
+        with open(argv[0], encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = journal_entries(ENTRIES)
+
+    from textblob import TextBlob
+
+    # One-off costs (lexicon parsing, TextBlob's pattern lexicon) are paid before timing
+    sentiment.analyze_sentiment(texts[0], "vader")
+    sentiment.analyze_sentiment(texts[0], "textblob")
+    reference = reference_analyzer()
+
+    textblob_rate, textblob = throughput(lambda t: TextBlob(t).sentiment, texts)
+    nltk_rate, nltk_scores = throughput(reference.polarity_scores, texts)
+    vader_rate, vader = throughput(sentiment.vader_scores, texts)
+    batch_rate, (batch,) = throughput(lambda chunk: sentiment.analyze_sentiment_batch(chunk, "vader"), [texts])
+    batch_rate *= len(texts)  # one "text" per pass above was the whole list
+
+    print(f"{len(texts)} journal entries, {np.mean([len(t) for t in texts]):.0f} characters on average")
+    print(f"{'TextBlob':<26}{textblob_rate:>10,.0f} texts/s")
+    print(f"{'nltk VADER':<26}{nltk_rate:>10,.0f} texts/s")
+    print(f"{'vader backend':<26}{vader_rate:>10,.0f} texts/s  ({vader_rate / textblob_rate:.1f}x TextBlob)")
+    print(f"{'vader backend, batch API':<26}{batch_rate:>10,.0f} texts/s")
+
+    # nltk scores every repeat of a word with the context of its first
+    # occurrence; the backend, like the original VADER, uses each position
+    diff = np.array([abs(a["compound"] - b["compound"]) for a, b in zip(nltk_scores, vader)])
+    print(f"\nvs nltk VADER: {np.mean(diff < 1e-3):.1%} of texts within 0.001 compound, "
+          f"mean |difference| {diff.mean():.4f}")
+
+    tb_polarity = np.array([s.polarity for s in textblob])
+    tb_subjectivity = np.array([s.subjectivity for s in textblob])
+    print("vs TextBlob:")
+    print(f"  polarity correlation      {np.corrcoef(tb_polarity, batch['polarity'])[0, 1]:.3f}")
+    print(f"  subjectivity correlation  {np.corrcoef(tb_subjectivity, batch['subjectivity'])[0, 1]:.3f}")
+    print(f"  same sentiment label      {np.mean(label(tb_polarity) == label(batch['polarity'])):.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+"""
+Throughput of the Ekman emotion matcher on journal-style text.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_text_emotions [entries.txt]
+
+A file argument is read as one journal entry per line; otherwise entries are
+assembled from the sentence bank of ``bench_sentiment``. The compiled
+automaton is compared with the straightforward alternative of searching
+every text once per lexicon term with a word-boundary regex (without the
+matcher's negation and nested-term handling, so it does less work per hit).
+"""
+import re
+import sys
+import time
+
+import numpy as np
+
+import text_emotions
+from benchmarks.bench_sentiment import ENTRIES, journal_entries, throughput
+
+
+def naive_scorer(lexicon):
+    """One compiled regex per term, each run over the whole text."""
+    patterns = [
+        (re.compile(r"\b" + r"\s+".join(map(re.escape, tokens)) + r"\b"),
+         [(text_emotions.EMOTIONS.index(e), w) for e, w in weights.items()])
+        for tokens, weights in lexicon.items()
+    ]
+
+    def score(text):
+        text = text.lower().replace("’", "'")
+        scores = [0.0] * len(text_emotions.EMOTIONS)
+        for pattern, weights in patterns:
+            hits = len(pattern.findall(text))
+            for emotion, weight in weights:
+                scores[emotion] += hits * weight
+        return scores
+
+    return score
+
+
+def main(argv):
+    if argv:
+        with open(argv[0], encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = journal_entries(ENTRIES)
+
+    lexicon = text_emotions.load_lexicon(text_emotions.DEFAULT_LEXICON)
+    start = time.perf_counter()
+    matcher = text_emotions.compile_matcher(lexicon)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    naive_rate, _ = throughput(naive_scorer(lexicon), texts)
+    matcher_rate, _ = throughput(lambda text: text_emotions.analyze_emotions(text, matcher), texts)
+    batch_rate, (batch,) = throughput(lambda chunk: text_emotions.analyze_emotions_batch(chunk, matcher), [texts])
+    batch_rate *= len(texts)  # one "text" per pass above was the whole list
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 1e6
+
+    print(f"{len(texts)} journal entries, {np.mean([len(t) for t in texts]):.0f} characters on average")
+    print(f"lexicon: {len(lexicon)} terms, {len(matcher['goto'])} automaton states, compiled in {compile_ms:.1f} ms")
+    print(f"{'regex per term':<26}{naive_rate:>10,.0f} texts/s")
+    print(f"{'matcher':<26}{matcher_rate:>10,.0f} texts/s  ({matcher_rate / naive_rate:.1f}x)")
+    print(f"{'matcher, batch API':<26}{batch_rate:>10,.0f} texts/s  ({batch_rate * megabytes / len(texts):.1f} MB/s)")
+
+    print(f"\n{np.mean(batch['matches'] > 0):.1%} of entries matched a term, {batch['matches'].mean():.1f} terms on average")
+    dominant = np.where(batch["scores"].sum(axis=1) > 0, batch["scores"].argmax(axis=1), -1)
+    for i, emotion in enumerate(text_emotions.EMOTIONS):
+        print(f"  {emotion:<10} mean intensity {batch['intensities'][:, i].mean():.2f}, "
+              f"dominant in {np.mean(dominant == i):.1%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
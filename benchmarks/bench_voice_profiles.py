@@ -0,0 +1,60 @@
+"""
+Compare analysis profiles: latency of analyze_voice and how far the
+reported pitch statistics move relative to the "full" profile.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_voice_profiles [recording.wav ...]
+
+Without arguments, synthetic speech-like recordings at 44.1 and 48 kHz are used.
+"""
+import statistics
+import sys
+import time
+
+import voice_analysis
+from benchmarks._signals import synth_speech, to_wav_bytes
+
+REPEATS = 5
+
+
+def time_analysis(wav_bytes, profile):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = voice_analysis.analyze_voice(wav_bytes, profile=profile)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main(paths):
+    if paths:
+        recordings = [(path, open(path, "rb").read()) for path in paths]
+    else:
+        recordings = [
+            (f"synthetic {sr // 1000} kHz, {duration:.0f} s", to_wav_bytes(synth_speech(duration, sr)[0], sr))
+            for sr in (44100, 48000) for duration in (10.0, 60.0)
+        ]
+
+    # Pay librosa's numba JIT warm-up before timing anything
+    voice_analysis.analyze_voice(recordings[0][1])
+
+    print(f"{'recording':<28}{'profile':<14}{'median ms':>10}{'speedup':>9}"
+          f"{'mean Hz':>9}{'d mean':>8}{'std Hz':>8}{'d std':>7}")
+    for name, wav_bytes in recordings:
+        baseline = None
+        for profile in voice_analysis.ANALYSIS_PROFILES:
+            seconds, result = time_analysis(wav_bytes, profile)
+            if not isinstance(result, dict):
+                print(f"{name:<28}{profile:<14}{seconds * 1000:>10.1f}  {result}")
+                continue
+            if baseline is None:
+                baseline = (seconds, result)
+            speedup = baseline[0] / seconds
+            d_mean = result["mean_pitch_hz"] - baseline[1]["mean_pitch_hz"]
+            d_std = result["pitch_variability"] - baseline[1]["pitch_variability"]
+            print(f"{name:<28}{profile:<14}{seconds * 1000:>10.1f}{speedup:>8.1f}x"
+                  f"{result['mean_pitch_hz']:>9.1f}{d_mean:>+8.1f}{result['pitch_variability']:>8.1f}{d_std:>+7.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
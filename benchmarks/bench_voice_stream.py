@@ -0,0 +1,77 @@
+"""
+Streaming versus in-memory voice analysis: analyze_voice_stream must give
+the same report as analyze_voice, whatever the block size.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_voice_stream [recording.wav ...]
+
+Without arguments, synthetic speech-like recordings are used, one of them
+getting 40 dB louder from start to end. Each file is streamed in blocks far
+smaller than the recording, so pauses and speech spans cross many block
+edges. For every profile the benchmark reports both latencies, the peak
+memory traced by tracemalloc, and every report field that differs; it exits
+with status 1 if any does.
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import voice_analysis
+from benchmarks._signals import synth_speech, to_wav_bytes
+
+BLOCK_SIZES = (2 ** 14, voice_analysis.STREAM_BLOCK_SIZE)
+
+
+def traced(run):
+    """(seconds, peak traced MB, result) of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def differences(expected, actual):
+    if not isinstance(expected, dict) or not isinstance(actual, dict):
+        return [] if expected == actual else [f"{expected!r} != {actual!r}"]
+    return [f"{key}: {expected[key]} != {actual.get(key)}" for key in expected if expected[key] != actual.get(key)]
+
+
+def main(paths):
+    if paths:
+        recordings = [(path, open(path, "rb").read()) for path in paths]
+    else:
+        recordings = [
+            (f"synthetic {sr // 1000} kHz, {duration:.0f} s", to_wav_bytes(synth_speech(duration, sr)[0], sr))
+            for sr, duration in ((16000, 5.0), (44100, 30.0))
+        ]
+        y = synth_speech(30.0, 44100)[0]
+        rising = (y * np.geomspace(0.01, 1, len(y))).astype(np.float32)
+        recordings.append(("synthetic 44 kHz, rising", to_wav_bytes(rising, 44100)))
+
+    # Pay librosa's numba JIT warm-up before timing anything
+    voice_analysis.warm_up()
+
+    failures = 0
+    print(f"{'recording':<26}{'profile':<13}{'block':>8}{'memory ms':>11}{'stream ms':>11}"
+          f"{'memory MB':>11}{'stream MB':>11}  differences")
+    for name, wav_bytes in recordings:
+        for profile in voice_analysis.ANALYSIS_PROFILES:
+            in_memory = traced(lambda: voice_analysis.analyze_voice(wav_bytes, profile=profile))
+            for block_size in BLOCK_SIZES:
+                streamed = traced(lambda: voice_analysis.analyze_voice_stream(
+                    wav_bytes, block_size=block_size, profile=profile))
+                diff = differences(in_memory[2], streamed[2])
+                failures += bool(diff)
+                print(f"{name:<26}{profile:<13}{block_size:>8}{in_memory[0] * 1000:>11.0f}{streamed[0] * 1000:>11.0f}"
+                      f"{in_memory[1]:>11.1f}{streamed[1]:>11.1f}  {'; '.join(diff) or 'none'}")
+    if failures:
+        sys.exit(f"{failures} streamed report(s) differ from analyze_voice")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
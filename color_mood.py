@@ -0,0 +1,236 @@
+import functools
+import os
+
+import numpy as np
+
+# Color-Mood Mapping
+COLOR_MOOD_MAP = {
+    'red': 'Angry/Passionate',
+    'blue': 'Calm/Peaceful',
+    'green': 'Balanced/Hopeful',
+    'yellow': 'Happy/Energetic',
+    'orange': 'Excited/Enthusiastic',
+    'purple': 'Creative/Mysterious',
+    'pink': 'Loving/Playful',
+    'brown': 'Stable/Grounded',
+    'black': 'Depressed/Anxious',
+    'white': 'Pure/Innocent',
+    'gray': 'Neutral/Indifferent',
+    'teal': 'Refreshed/Calm',
+    'magenta': 'Bold/Innovative',
+    'lavender': 'Relaxed/Serene',
+    'gold': 'Joyful/Optimistic',
+    'silver': 'Calm/Reflective',
+    'turquoise': 'Refreshed/Calm',
+    'maroon': 'Serious/Disciplined',
+    'navy': 'Trusting/Reliable',
+    'beige': 'Comfortable/Relaxed'
+}
+
+# Reference palette the mood map is keyed on
+SIMPLE_COLORS = {
+    "ff0000": "red", "0000ff": "blue", "00ff00": "green",
+    "ffff00": "yellow", "ffa500": "orange", "800080": "purple",
+    "ffc0cb": "pink", "a52a2a": "brown", "000000": "black",
+    "ffffff": "white", "808080": "gray", "008080": "teal",
+    "ff00ff": "magenta", "e6e6fa": "lavender", "ffd700": "gold",
+    "c0c0c0": "silver", "40e0d0": "turquoise", "800000": "maroon",
+    "000080": "navy", "f5f5dc": "beige"
+}
+
+# Bits per channel of the quantized lookup table (5 -> 32x32x32 cells)
+LUT_BITS = 5
+
+# Colors classified per chunk by the exact search, bounding temporary memory
+_CHUNK = 1 << 16
+
+# Photo palette extraction: pixels are analyzed on a copy whose longest side
+# is at most this, in a histogram with HISTOGRAM_BITS per channel
+ANALYSIS_MAX_SIDE = 256
+HISTOGRAM_BITS = 4
+DOMINANT_COLOR_BUDGET_MS = 50
+
+
+# Function to convert hex to RGB
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+# The palette compiled once at import: names and an (n, 3) RGB array
+PALETTE_NAMES = np.array(list(SIMPLE_COLORS.values()))
+PALETTE_RGB = np.array([hex_to_rgb(code) for code in SIMPLE_COLORS], dtype=np.int32)
+_PALETTE_NORMS = (PALETTE_RGB ** 2).sum(axis=1)
+
+
+def _as_rgb_array(colors):
+    """Accept a hex string, an RGB triple, or an (N, 3) array; return (rgb, single)."""
+    if isinstance(colors, str):
+        return np.array([hex_to_rgb(colors)], dtype=np.int32), True
+    rgb = np.asarray(colors)
+    if rgb.ndim == 1:
+        return rgb.reshape(1, 3).astype(np.int32), True
+    return rgb.reshape(-1, 3), False
+
+
+def nearest_color_index(rgb):
+    """
+    Exact nearest palette entry (Euclidean RGB distance) for an (N, 3) array.
+
+    Returns:
+        np.ndarray: Palette indices into ``PALETTE_NAMES``.
+    """
+    rgb = np.asarray(rgb).reshape(-1, 3)
+    out = np.empty(len(rgb), dtype=np.uint8)
+    for start in range(0, len(rgb), _CHUNK):
+        chunk = rgb[start:start + _CHUNK].astype(np.int32)
+        # |c - p|^2 minus the per-row constant |c|^2
+        distances = _PALETTE_NORMS - 2 * (chunk @ PALETTE_RGB.T)
+        out[start:start + _CHUNK] = distances.argmin(axis=1)
+    return out
+
+
+# Function to find the nearest color
+def find_nearest_color(colors):
+    """
+    Name the nearest palette color.
+
+    Args:
+        colors: A hex string ("#0000ff" or "0000ff"), an RGB triple, or an
+            (N, 3) array of RGB values.
+
+    Returns:
+        str | np.ndarray: A color name, or an array of names for batch input.
+    """
+    rgb, single = _as_rgb_array(colors)
+    names = PALETTE_NAMES[nearest_color_index(rgb)]
+    return str(names[0]) if single else names
+
+
+def _cell_centers(bits):
+    """RGB center of every cell when each channel is quantized to ``bits`` bits, as an (N, 3) array."""
+    size = 1 << bits
+    step = 256 // size
+    centers = np.arange(size) * step + step // 2
+    return np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def build_color_lut(bits=LUT_BITS):
+    """
+    Precompute the nearest palette index for every quantized RGB cell.
+
+    Each cell is classified at its center, so lookups are exact except for
+    colors within half a cell of a palette boundary.
+
+    Returns:
+        np.ndarray: uint8 array of shape (2**bits,) * 3.
+    """
+    size = 1 << bits
+    return nearest_color_index(_cell_centers(bits)).reshape(size, size, size)
+
+
+def save_color_lut(path, bits=LUT_BITS):
+    """Write a lookup table as .npy so it can be memory-mapped by ``load_color_lut``."""
+    np.save(path, build_color_lut(bits))
+
+
+def load_color_lut(path):
+    """Memory-map a lookup table written by ``save_color_lut``."""
+    return np.load(path, mmap_mode="r")
+
+
+@functools.lru_cache(maxsize=1)
+def get_color_lut():
+    """
+    The process-wide lookup table: memory-mapped from ``COLOR_LUT_PATH`` if
+    that environment variable is set, otherwise built on first use.
+    """
+    path = os.environ.get("COLOR_LUT_PATH")
+    return load_color_lut(path) if path else build_color_lut()
+
+
+def lookup_colors(colors, lut=None):
+    """
+    O(1)-per-color palette classification through the quantized lookup table.
+
+    Args:
+        colors: As for ``find_nearest_color``; uint8 pixel arrays work directly.
+        lut (np.ndarray): A table from ``build_color_lut``; defaults to
+            ``get_color_lut()``.
+
+    Returns:
+        str | np.ndarray: A color name, or an array of names for batch input.
+    """
+    lut = get_color_lut() if lut is None else lut
+    shift = 8 - int(np.log2(lut.shape[0]))
+    rgb, single = _as_rgb_array(colors)
+    rgb = rgb.astype(np.uint8, copy=False) >> shift
+    names = PALETTE_NAMES[lut[rgb[:, 0], rgb[:, 1], rgb[:, 2]]]
+    return str(names[0]) if single else names
+
+
+def mood_for_color(hex_color):
+    """Mood associated with the palette color nearest to ``hex_color``."""
+    return COLOR_MOOD_MAP.get(find_nearest_color(hex_color), "Unknown")
+
+
+@functools.lru_cache(maxsize=4)
+def _histogram_palette(bits):
+    """Nearest palette index for the center of every histogram bin."""
+    grid = _cell_centers(bits)
+    return nearest_color_index(grid), grid
+
+
+def _downsample(image, max_side=ANALYSIS_MAX_SIDE):
+    """Reduce a PIL image to at most ``max_side`` pixels on its longest side, cheaply."""
+    factor = max(image.size) // max_side
+    if factor > 1:
+        # JPEGs not yet decoded are decoded at 1/2, 1/4 or 1/8 scale directly
+        image.draft("RGB", (image.width // factor, image.height // factor))
+        factor = max(image.size) // max_side
+        if factor > 1:
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGB")
+            image = image.reduce(factor)
+    return image.convert("RGB")
+
+
+def dominant_colors(image, n_colors=3, max_side=ANALYSIS_MAX_SIDE):
+    """
+    Dominant palette colors of a photo and their moods.
+
+    The image is downsampled, its pixels are counted in a coarse RGB
+    histogram, and the bins are folded onto the reference palette, so the
+    cost is independent of the photo's resolution after the downsample.
+
+    Args:
+        image (PIL.Image.Image): The photo. An unloaded JPEG is decoded at
+            reduced scale.
+        n_colors (int): Number of colors to return.
+        max_side (int): Longest side of the copy that is analyzed.
+
+    Returns:
+        list: Dicts with "color", "mood", "share" (fraction of pixels) and
+        "rgb" (average color of those pixels), most dominant first.
+    """
+    pixels = np.asarray(_downsample(image, max_side)).reshape(-1, 3) >> (8 - HISTOGRAM_BITS)
+    bins = (pixels[:, 0].astype(np.int32) << (2 * HISTOGRAM_BITS)) | (pixels[:, 1].astype(np.int32) << HISTOGRAM_BITS) | pixels[:, 2]
+    counts = np.bincount(bins, minlength=1 << (3 * HISTOGRAM_BITS))
+
+    palette_index, centers = _histogram_palette(HISTOGRAM_BITS)
+    totals = np.bincount(palette_index, weights=counts, minlength=len(PALETTE_NAMES))
+    rgb_sums = np.stack([np.bincount(palette_index, weights=counts * centers[:, i], minlength=len(PALETTE_NAMES))
+                         for i in range(3)], axis=1)
+
+    results = []
+    for index in np.argsort(-totals, kind="stable")[:n_colors]:
+        if totals[index] == 0:
+            break
+        name = str(PALETTE_NAMES[index])
+        results.append({
+            "color": name,
+            "mood": COLOR_MOOD_MAP.get(name, "Unknown"),
+            "share": float(totals[index] / len(bins)),
+            "rgb": tuple(int(v) for v in rgb_sums[index] / totals[index])
+        })
+    return results
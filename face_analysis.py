@@ -0,0 +1,214 @@
+"""
+Face detection and facial emotion classification for stage2_app.
+
+Face detectors (FACE_DETECTOR selects the default, "detr" unless set):
+
+``detr``
+    DETR-ResNet-50 from the local model store (see ``model_store``); its
+    "person" boxes stand in for faces, so crops are usually whole people.
+``haar``
+    OpenCV's frontal-face Haar cascade, a few hundred kilobytes of weights
+    that ship with opencv-python (or FACE_CASCADE_PATH). It finds faces
+    only, runs on the CPU in a fraction of DETR's time and needs no model
+    download; it misses faces turned well away from the camera.
+
+The emotion classifier also comes from the model store. All faces
+found in a photo are classified together, in batches of up to
+FACE_BATCH_SIZE crops (default 16), so a group photo costs a few batched
+forward passes instead of one per face.
+
+Uploads are decoded with their longest side capped at PHOTO_MAX_SIDE (JPEGs
+directly at a reduced scale), and the detector sees a copy capped at
+DETECTION_MAX_SIDE, DETR's own longest input side. Boxes are mapped back to
+the decoded photo, which faces are cropped from, and reported in the
+original photo's coordinates. Memory per upload and detection time are
+therefore bounded whatever the camera's resolution.
+"""
+import functools
+import os
+import threading
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import model_store
+
+FACE_BATCH_SIZE = int(os.environ.get("FACE_BATCH_SIZE", 16))
+PHOTO_MAX_SIDE = int(os.environ.get("PHOTO_MAX_SIDE", 1600))
+DETECTION_MAX_SIDE = int(os.environ.get("DETECTION_MAX_SIDE", 1333))
+DEFAULT_FACE_DETECTOR = os.environ.get("FACE_DETECTOR", "detr")
+FACE_CASCADE_PATH = os.environ.get("FACE_CASCADE_PATH")
+
+# DETR detections kept as faces
+FACE_LABEL = "person"
+MIN_DETECTION_SCORE = 0.9
+
+# Haar cascade search: scale step between pyramid levels, overlapping hits
+# required to keep a face, and the smallest face in pixels
+CASCADE_SCALE_FACTOR = 1.1
+CASCADE_MIN_NEIGHBORS = 5
+CASCADE_MIN_FACE = 40
+
+_cascade_lock = threading.Lock()
+
+
+def _capped(image, max_side):
+    """``image``, or a resized copy if its longest side exceeds ``max_side``."""
+    if max(image.size) <= max_side:
+        return image
+    image = image.copy()
+    image.thumbnail((max_side, max_side), Image.BILINEAR)
+    return image
+
+
+def load_photo(file, max_side=PHOTO_MAX_SIDE):
+    """
+    Decode an uploaded photo with its longest side capped at ``max_side``.
+
+    A JPEG is decoded at 1/2, 1/4 or 1/8 scale directly when that still
+    leaves at least ``max_side`` pixels, so the full-resolution image is
+    never held in memory.
+
+    Returns:
+        tuple: (RGB image, (width, height) of the original photo).
+    """
+    image = Image.open(file)
+    original_size = image.size
+    scale = max_side / max(original_size)
+    if scale < 1:
+        image.draft("RGB", (round(image.width * scale), round(image.height * scale)))
+    return _capped(image.convert("RGB"), max_side), original_size
+
+
+def _detect_detr(image):
+    face_detector = model_store.get_pipeline("face_detector")
+    return [
+        (result["box"]["xmin"], result["box"]["ymin"], result["box"]["xmax"], result["box"]["ymax"])
+        for result in face_detector(image)
+        if result["label"] == FACE_LABEL and result["score"] > MIN_DETECTION_SCORE
+    ]
+
+
+@functools.lru_cache(maxsize=1)
+def get_face_cascade():
+    """The Haar cascade, loaded once per process."""
+    import cv2
+
+    path = FACE_CASCADE_PATH or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        raise FileNotFoundError(f"Could not load a Haar cascade from {path}")
+    return cascade
+
+
+def _detect_haar(image):
+    gray = np.asarray(image.convert("L"))
+    cascade = get_face_cascade()
+    # One cascade object serves every session; OpenCV does not promise it is thread-safe
+    with _cascade_lock:
+        faces = cascade.detectMultiScale(gray, scaleFactor=CASCADE_SCALE_FACTOR, minNeighbors=CASCADE_MIN_NEIGHBORS,
+                                         minSize=(CASCADE_MIN_FACE, CASCADE_MIN_FACE))
+    return [(int(x), int(y), int(x + w), int(y + h)) for x, y, w, h in faces]
+
+
+FACE_DETECTORS = {"detr": _detect_detr, "haar": _detect_haar}
+
+# Model store entries each detector needs, besides the emotion classifier
+DETECTOR_MODELS = {"detr": ["face_detector"], "haar": []}
+
+
+def get_face_detector(backend=None):
+    """
+    Look up a face detector by name.
+
+    Args:
+        backend (str): A key of ``FACE_DETECTORS``; defaults to the
+            ``FACE_DETECTOR`` environment variable, then "detr".
+
+    Returns:
+        callable: Maps an RGB image to (xmin, ymin, xmax, ymax) boxes.
+    """
+    name = backend or DEFAULT_FACE_DETECTOR
+    if name not in FACE_DETECTORS:
+        raise ValueError(f"Unknown face detector '{name}'. Choose from: {', '.join(FACE_DETECTORS)}")
+    return FACE_DETECTORS[name]
+
+
+def missing_models(backend=None):
+    """Model store entries that ``detect_and_analyze_faces`` needs but are not available."""
+    get_face_detector(backend)
+    needed = DETECTOR_MODELS[backend or DEFAULT_FACE_DETECTOR] + ["emotion_classifier"]
+    return [name for name in needed if not model_store.is_available(name)]
+
+
+def detect_faces(image, max_side=DETECTION_MAX_SIDE, backend=None):
+    """
+    Faces in ``image``, detected on a copy capped at ``max_side``.
+
+    Args:
+        image (PIL.Image.Image): An RGB photo.
+        max_side (int): Longest side of the copy the detector sees.
+        backend (str): A key of ``FACE_DETECTORS``.
+
+    Returns:
+        list: (xmin, ymin, xmax, ymax) boxes in ``image`` coordinates.
+    """
+    detect = get_face_detector(backend)
+    detection_image = _capped(image, max_side)
+    scale_x, scale_y = image.width / detection_image.width, image.height / detection_image.height
+    return [
+        (round(xmin * scale_x), round(ymin * scale_y), round(xmax * scale_x), round(ymax * scale_y))
+        for xmin, ymin, xmax, ymax in detect(detection_image)
+    ]
+
+
+def classify_faces(faces, batch_size=None):
+    """
+    Classify face crops in batches.
+
+    Args:
+        faces (list[PIL.Image.Image]): Face crops.
+        batch_size (int): Most crops per forward pass; FACE_BATCH_SIZE if omitted.
+
+    Returns:
+        list: One list of {"label", "score"} predictions per face, best first.
+    """
+    if not faces:
+        return []
+    emotion_classifier = model_store.get_pipeline("emotion_classifier")
+    return emotion_classifier(list(faces), batch_size=max(1, batch_size or FACE_BATCH_SIZE))
+
+
+def detect_and_analyze_faces(image, original_size=None, backend=None):
+    """
+    Detect the faces in a photo, classify their emotions and draw the results.
+
+    Args:
+        image (PIL.Image.Image): The photo, e.g. from ``load_photo``.
+        original_size (tuple): (width, height) of the photo ``image`` was
+            reduced from; positions are reported in its coordinates.
+        backend (str): A key of ``FACE_DETECTORS``.
+
+    Returns:
+        tuple: (``image`` with a labelled box per face, list of
+        {"position": (x, y, width, height), "emotion", "confidence"}).
+    """
+    original_width, original_height = original_size or image.size
+    scale_x, scale_y = original_width / image.width, original_height / image.height
+    boxes = detect_faces(image, backend=backend)
+    # Every crop is taken before any box is drawn onto the image
+    predictions = classify_faces([image.crop(box) for box in boxes])
+
+    draw = ImageDraw.Draw(image)
+    emotions = []
+    for (xmin, ymin, xmax, ymax), prediction in zip(boxes, predictions):
+        top_emotion = prediction[0]["label"]
+        draw.rectangle([xmin, ymin, xmax, ymax], outline="red", width=2)
+        draw.text((xmin, ymin - 20), top_emotion, fill="red")
+        emotions.append({
+            "position": (round(xmin * scale_x), round(ymin * scale_y),
+                         round((xmax - xmin) * scale_x), round((ymax - ymin) * scale_y)),
+            "emotion": top_emotion,
+            "confidence": prediction[0]["score"]
+        })
+    return image, emotions
@@ -0,0 +1,156 @@
+"""
+Local store for the stage 2 face models.
+
+Every model is a ``save_pretrained`` directory with safetensors weights under
+MODEL_DIR ("models" next to this module unless set), named after its Hub
+repository with "/" replaced by "--". Pipelines are built from those
+directories only (``local_files_only``), so the app never contacts the Hub,
+and each one is loaded the first time it is requested rather than at
+startup. transformers maps safetensors weights into memory instead of
+copying them, so server processes on one machine share the page cache's
+copy of the weights rather than each holding its own.
+
+Pipelines run under ``torch.inference_mode``. With MODEL_PRECISION=int8
+the Linear layers are dynamically quantized to int8 weights at load time,
+which shrinks and speeds up the transformer layers on CPU at a small cost
+in accuracy (benchmarks/bench_quantization.py measures both); the default
+is "fp32". TORCH_NUM_THREADS, if set, fixes PyTorch's intra-op threads for
+the process when the first model loads.
+
+Populate the store once, on a machine with network access:
+    python model_store.py fetch
+    python model_store.py list
+"""
+import argparse
+import os
+import sys
+import threading
+import warnings
+
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+DEFAULT_PRECISION = os.environ.get("MODEL_PRECISION", "fp32")
+TORCH_NUM_THREADS = int(os.environ.get("TORCH_NUM_THREADS", 0))
+
+PRECISIONS = ("fp32", "int8")
+
+MODELS = {
+    "face_detector": {
+        "task": "object-detection",
+        "repo_id": "facebook/detr-resnet-50",
+        "model_class": "AutoModelForObjectDetection"
+    },
+    "emotion_classifier": {
+        "task": "image-classification",
+        "repo_id": "Rajaram1996/FacialEmoRecog",
+        "model_class": "AutoModelForImageClassification"
+    }
+}
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+class ModelNotFoundError(FileNotFoundError):
+    """A model is not in the local store."""
+
+
+def model_path(name):
+    return os.path.join(MODEL_DIR, MODELS[name]["repo_id"].replace("/", "--"))
+
+
+def is_available(name):
+    """Whether the store holds ``name`` with safetensors weights (single or sharded)."""
+    path = model_path(name)
+    return os.path.isfile(os.path.join(path, "config.json")) and any(
+        os.path.isfile(os.path.join(path, weights))
+        for weights in ("model.safetensors", "model.safetensors.index.json")
+    )
+
+
+def quantize_linear_layers(model):
+    """Replace the model's Linear layers with dynamically quantized int8 ones, in place."""
+    import torch
+
+    with warnings.catch_warnings():
+        # The eager-mode quantization API is deprecated in favour of torchao, which is not a dependency
+        warnings.simplefilter("ignore")
+        # In place: a copy would first duplicate every memory-mapped weight in private memory
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_pipeline(name, precision=None):
+    """
+    Build a pipeline from the local store, without caching it.
+
+    Args:
+        name (str): A key of ``MODELS``.
+        precision (str): "fp32" or "int8"; MODEL_PRECISION if omitted.
+
+    Raises:
+        ModelNotFoundError: If the model has not been fetched into MODEL_DIR.
+        ValueError: For an unknown precision.
+    """
+    precision = precision or DEFAULT_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Choose from: {', '.join(PRECISIONS)}")
+    if not is_available(name):
+        raise ModelNotFoundError(
+            f"Model '{name}' is not in {MODEL_DIR}; run `python model_store.py fetch` where the Hub is reachable")
+    import torch
+    import transformers
+
+    if TORCH_NUM_THREADS > 0:
+        torch.set_num_threads(TORCH_NUM_THREADS)
+    spec, path = MODELS[name], model_path(name)
+    model = getattr(transformers, spec["model_class"]).from_pretrained(
+        path, local_files_only=True, use_safetensors=True)
+    model.eval()
+    if precision == "int8":
+        quantize_linear_layers(model)
+    processor = transformers.AutoImageProcessor.from_pretrained(path, local_files_only=True)
+    pipeline = transformers.pipeline(spec["task"], model=model, image_processor=processor)
+    # Pipelines run the model under no_grad; inference_mode also skips autograd's version tracking
+    pipeline.get_inference_context = lambda: torch.inference_mode
+    return pipeline
+
+
+def get_pipeline(name, precision=None):
+    """The process-wide pipeline for ``name`` at ``precision``, loaded on first use."""
+    key = (name, precision or DEFAULT_PRECISION)
+    with _pipelines_lock:
+        if key not in _pipelines:
+            _pipelines[key] = load_pipeline(*key)
+        return _pipelines[key]
+
+
+def fetch_model(name):
+    """Download a model from the Hub and save it into the store as safetensors."""
+    import transformers
+
+    spec, path = MODELS[name], model_path(name)
+    model = getattr(transformers, spec["model_class"]).from_pretrained(spec["repo_id"])
+    processor = transformers.AutoImageProcessor.from_pretrained(spec["repo_id"])
+    model.save_pretrained(path, safe_serialization=True)
+    processor.save_pretrained(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local model store for stage2_app.")
+    parser.add_argument("command", choices=["fetch", "list"])
+    parser.add_argument("names", nargs="*", help=f"models (default: all of {', '.join(MODELS)})")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(MODELS)
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(sorted(unknown))}")
+
+    for name in args.names or MODELS:
+        if args.command == "fetch":
+            print(f"{name}: saved to {fetch_model(name)}")
+        else:
+            print(f"{name:<20}{'available' if is_available(name) else 'missing':<11}{model_path(name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
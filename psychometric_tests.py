@@ -1,3 +1,11 @@
+import bisect
+import math
+
+import numpy as np
+
+# Each test's "version" is stored with recorded responses (see response_store).
+# Bump it when a change alters what a stored answer means, e.g. reordered
+# questions or options; wording fixes keep the version.
 TESTS = {
     "K10 (Kessler Psychological Distress Scale)": {
         "questions": [
@@ -14,6 +22,7 @@ TESTS = {
         ],
         "options": ["None of the time", "A little of the time", "Some of the time", "Most of the time", "All of the time"],
         "scoring": [1, 2, 3, 4, 5],
+        "version": 1,
         "interpretation": {
             "10–19": "Likely well",
             "20–24": "Mild distress",
@@ -38,6 +47,7 @@ TESTS = {
         ],
         "options": ["Not at all", "No more than usual", "Rather more than usual", "Much more than usual"],
         "scoring": [0, 1, 2, 3],
+        "version": 1,
         "interpretation": {
             "0–12": "Low distress",
             "13–24": "Moderate distress",
@@ -58,6 +68,7 @@ TESTS = {
         ],
         "options": ["Not at all", "Several days", "More than half the days", "Nearly every day"],
         "scoring": [0, 1, 2, 3],
+        "version": 1,
         "interpretation": {
             "0–4": "Minimal depression",
             "5–9": "Mild depression",
@@ -78,6 +89,7 @@ TESTS = {
         ],
         "options": ["Not at all", "Several days", "More than half the days", "Nearly every day"],
         "scoring": [0, 1, 2, 3],
+        "version": 1,
         "interpretation": {
             "0–4": "Minimal anxiety",
             "5–9": "Mild anxiety",
@@ -100,6 +112,7 @@ TESTS = {
         ],
         "options": ["Never", "Almost never", "Sometimes", "Fairly often", "Very often"],
         "scoring": [0, 1, 2, 3, 4],
+        "version": 1,
         "interpretation": {
             "0–13": "Low stress",
             "14–26": "Moderate stress",
@@ -132,6 +145,12 @@ TESTS = {
         ],
         "options": ["Did not apply to me at all", "Applied to me to some degree, or some of the time", "Applied to me to a considerable degree, or a good part of time", "Applied to me very much, or most of the time"],
         "scoring": [0, 1, 2, 3],
+        "version": 1,
+        "subscales": {
+            "Depression": list(range(0, 21, 3)),  # Questions 1,4,7,...
+            "Anxiety": list(range(1, 21, 3)),     # Questions 2,5,8,...
+            "Stress": list(range(2, 21, 3))       # Questions 3,6,9,...
+        },
         "interpretation": {
             "Depression": {
                 "0–9": "Normal",
@@ -163,6 +182,11 @@ TESTS = {
         ],
         "options": ["Very slightly or not at all", "A little", "Moderately", "Quite a bit", "Extremely"],
         "scoring": [1, 2, 3, 4, 5],
+        "version": 1,
+        "subscales": {
+            "Positive Affect": list(range(0, 10)),  # First 10 items
+            "Negative Affect": list(range(10, 20))  # Last 10 items
+        },
         "interpretation": {
             "Positive Affect": "Higher scores indicate more positive emotions",
             "Negative Affect": "Higher scores indicate more negative emotions"
@@ -175,6 +199,15 @@ TESTS = {
         ],
         "options": ["Not at all", "A little", "Moderately", "Quite a bit", "Extremely"],
         "scoring": [0, 1, 2, 3, 4],
+        "version": 1,
+        "subscales": {
+            "Tension": list(range(0, 20, 6)),     # Questions 1,7,13,19
+            "Depression": list(range(1, 20, 6)),  # Questions 2,8,14,20
+            "Anger": list(range(2, 20, 6)),       # Questions 3,9,15
+            "Vigor": list(range(3, 20, 6)),       # Questions 4,10,16
+            "Fatigue": list(range(4, 20, 6)),     # Questions 5,11,17
+            "Confusion": list(range(5, 20, 6))    # Questions 6,12,18
+        },
         "interpretation": {
             "Tension": "Higher scores indicate more tension",
             "Depression": "Higher scores indicate more depression",
@@ -199,6 +232,7 @@ TESTS = {
         ],
         "options": ["Never", "Rarely", "Sometimes", "Often", "Always"],
         "scoring": [1, 2, 3, 4, 5],
+        "version": 1,
         "interpretation": {
             "0–20": "Minimal cognitive distortions",
             "21–30": "Mild cognitive distortions",
@@ -221,6 +255,7 @@ TESTS = {
         ],
         "options": ["No", "Yes"],
         "scoring": [0, 1],
+        "version": 1,
         "interpretation": {
             "0": "No self-harm",
             "1–3": "Mild self-harm",
@@ -230,118 +265,266 @@ TESTS = {
     }
 }
 
+# Name of the single scale of tests without subscales
+TOTAL_SCALE = "Total"
+
+NO_INTERPRETATION = "No interpretation available"
+
+# Respondents scored per chunk by score_batch, bounding temporary memory
+BATCH_CHUNK_ROWS = 1 << 18
+
+
+def parse_score_range(range_str):
+    """
+    Parse an interpretation key into inclusive bounds.
+
+    Args:
+        range_str (str): The range string (e.g., "0–4", "28+", "0").
+
+    Returns:
+        tuple: (low, high); high is ``math.inf`` for open-ended ranges.
+    """
+    if "–" in range_str:
+        low, high = map(int, range_str.split("–"))
+    elif range_str.endswith("+"):
+        low, high = int(range_str[:-1]), math.inf
+    else:  # Single value interpretation (e.g., SHI)
+        low = high = int(range_str)
+    return low, high
+
+
+def _compile_bands(bands, min_score, max_score, where):
+    """
+    Turn a {range string: description} dict into sorted bisect tables.
+
+    Raises:
+        ValueError: If bands are inverted, overlap, leave a gap, or do not
+            cover every achievable score.
+    """
+    parsed = sorted((*parse_score_range(k), k, v) for k, v in bands.items())
+    for low, high, key, _ in parsed:
+        if low > high:
+            raise ValueError(f"{where}: band '{key}' is empty")
+    for (_, high, key, _), (low, _, next_key, _) in zip(parsed, parsed[1:]):
+        if low <= high:
+            raise ValueError(f"{where}: bands '{key}' and '{next_key}' overlap")
+        if low > high + 1:
+            raise ValueError(f"{where}: gap between bands '{key}' and '{next_key}'")
+    if parsed[0][0] > min_score or parsed[-1][1] < max_score:
+        raise ValueError(f"{where}: bands do not cover scores {min_score}–{max_score}")
+    return {
+        "lows": tuple(p[0] for p in parsed),
+        "highs": tuple(p[1] for p in parsed),
+        "labels": tuple(p[3] for p in parsed)
+    }
+
+
+def compile_scoring_plan(test_name, test_data):
+    """
+    Compile a test definition into a scoring plan.
+
+    Each subscale gets the indices of its items and either bisect threshold
+    tables (for banded interpretations) or a fixed description. Tests
+    without a "subscales" entry have a single scale named ``TOTAL_SCALE``
+    covering every item.
+
+    Args:
+        test_name (str): The name of the test, used in error messages.
+        test_data (dict): An entry of ``TESTS``.
+
+    Returns:
+        dict: {"n_items": int, "scoring": tuple, "subscales": list of dicts
+        with "name", "items" and either "bands" or "description",
+        "weights": (items, subscales) 0/1 matrix}.
+
+    Raises:
+        ValueError: If the definition is inconsistent (see ``_compile_bands``).
+    """
+    n_items = len(test_data["questions"])
+    interpretation = test_data["interpretation"]
+    subscales = test_data.get("subscales", {TOTAL_SCALE: range(n_items)})
+
+    compiled = []
+    for name, items in subscales.items():
+        items = tuple(items)
+        if not items or min(items) < 0 or max(items) >= n_items:
+            raise ValueError(f"{test_name}: subscale '{name}' has items outside 0–{n_items - 1}")
+        bands = interpretation if name == TOTAL_SCALE else interpretation[name]
+        subscale = {"name": name, "items": items}
+        if isinstance(bands, dict):
+            subscale["bands"] = _compile_bands(bands, len(items) * min(test_data["scoring"]),
+                                               len(items) * max(test_data["scoring"]), f"{test_name} / {name}")
+        else:
+            subscale["description"] = bands
+        compiled.append(subscale)
+
+    # Item-to-subscale incidence matrix, so all subscale totals are one matmul
+    weights = np.zeros((n_items, len(compiled)), dtype=np.float32)
+    for column, subscale in enumerate(compiled):
+        weights[list(subscale["items"]), column] = 1
+
+    return {"n_items": n_items, "scoring": tuple(test_data["scoring"]), "subscales": compiled, "weights": weights}
+
+
+# Compiled once at import, so invalid definitions fail immediately
+SCORING_PLANS = {name: compile_scoring_plan(name, data) for name, data in TESTS.items()}
+
+
+def _band_index(subscale, score):
+    bands = subscale["bands"]
+    i = bisect.bisect_right(bands["lows"], score) - 1
+    return i if i >= 0 and score <= bands["highs"][i] else -1
+
+
+def interpret_score(subscale, score):
+    """Description for ``score`` on a compiled subscale."""
+    if "description" in subscale:
+        return subscale["description"]
+    i = _band_index(subscale, score)
+    return subscale["bands"]["labels"][i] if i >= 0 else NO_INTERPRETATION
+
+
 def calculate_score(test_name, responses):
     """
-    Calculate the total score and interpretation for a given test.
-    
+    Calculate the subscale scores and interpretations for a given test.
+
     Args:
         test_name (str): The name of the test (e.g., "PHQ-9").
         responses (list): A list of user responses (scores for each question).
-    
+
     Returns:
-        For most tests: A tuple of (total_score, interpretation).
-        For DASS-21 and PANAS: A dictionary with subscale scores and interpretations.
+        dict: {subscale name: (score, interpretation)}. Tests without
+        subscales have a single ``TOTAL_SCALE`` entry.
+
+    Raises:
+        ValueError: If the number of responses does not match the test.
     """
-    test_data = TESTS[test_name]
-    total_score = sum(responses)
-    interpretation = test_data["interpretation"]
+    plan = SCORING_PLANS[test_name]
+    if len(responses) != plan["n_items"]:
+        raise ValueError(f"{test_name} has {plan['n_items']} questions, got {len(responses)} responses")
 
-    # Handle DASS-21 (Depression, Anxiety, and Stress Scale)
-    if test_name == "DASS-21 (Depression, Anxiety, and Stress Scale)":
-        depression_score = sum(responses[::3])  # Questions 1,4,7,...
-        anxiety_score = sum(responses[1::3])    # Questions 2,5,8,...
-        stress_score = sum(responses[2::3])     # Questions 3,6,9,...
-
-        depression_interpretation = next(
-            (v for k, v in interpretation["Depression"].items() 
-             if check_score_range(k, depression_score)),
-            "Unknown"
-        )
-        anxiety_interpretation = next(
-            (v for k, v in interpretation["Anxiety"].items() 
-             if check_score_range(k, anxiety_score)),
-            "Unknown"
-        )
-        stress_interpretation = next(
-            (v for k, v in interpretation["Stress"].items() 
-             if check_score_range(k, stress_score)),
-            "Unknown"
-        )
-
-        return {
-            "Depression": (depression_score, depression_interpretation),
-            "Anxiety": (anxiety_score, anxiety_interpretation),
-            "Stress": (stress_score, stress_interpretation)
-        }
+    results = {}
+    for subscale in plan["subscales"]:
+        score = sum(responses[i] for i in subscale["items"])
+        results[subscale["name"]] = (score, interpret_score(subscale, score))
+    return results
 
-    # Handle PANAS (Positive and Negative Affect Schedule)
-    elif test_name == "PANAS (Positive and Negative Affect Schedule)":
-        positive_affect = sum(responses[:10])  # First 10 items (positive affect)
-        negative_affect = sum(responses[10:])  # Last 10 items (negative affect)
-        return {
-                "Positive Affect": (positive_affect, interpretation["Positive Affect"]),
-                "Negative Affect": (negative_affect, interpretation["Negative Affect"])
-            }
 
-    # Handle POMS (Profile of Mood States)
-    elif test_name == "POMS (Profile of Mood States)":
-        tension = sum(responses[::6])  # Questions 1,7,13,19
-        depression = sum(responses[1::6])  # Questions 2,8,14,20
-        anger = sum(responses[2::6])  # Questions 3,9,15
-        vigor = sum(responses[3::6])  # Questions 4,10,16
-        fatigue = sum(responses[4::6])  # Questions 5,11,17
-        confusion = sum(responses[5::6])  # Questions 6,12,18
-
-        return f"""<strong>Tension</strong>: {tension, interpretation["Tension"]},<br>
-            <strong>Depression</strong>: {depression, interpretation["Depression"]},<br>
-            <strong>Anger</strong>: {anger, interpretation["Anger"]},<br>
-            <strong>Vigor</strong>: {vigor, interpretation["Vigor"]},<br>
-            <strong>Fatigue</strong>: {fatigue, interpretation["Fatigue"]},<br>
-            <strong>Confusion</strong>: {confusion, interpretation["Confusion"]}"""
-    
-        f"""**Tension**: {tension, interpretation["Tension"]},
-            **Depression**: {depression, interpretation["Depression"]},
-            **Anger**: {anger, interpretation["Anger"]},
-            **Vigor**: {vigor, interpretation["Vigor"]},
-            **Fatigue**: {fatigue, interpretation["Fatigue"]},
-            **Confusion**: {confusion, interpretation["Confusion"]}"""
-
-        """return {
-            "Tension": (tension, interpretation["Tension"]),
-            "Depression": (depression, interpretation["Depression"]),
-            "Anger": (anger, interpretation["Anger"]),
-            "Vigor": (vigor, interpretation["Vigor"]),
-            "Fatigue": (fatigue, interpretation["Fatigue"]),
-            "Confusion": (confusion, interpretation["Confusion"])
-        }"""
-
-    # Handle other tests (K10, GHQ-12, PHQ-9, GAD-7, PSS, CDS, SHI)
-    else:
-        for range_str, description in interpretation.items():
-            if check_score_range(range_str, total_score):
-                return description
-                #return total_score, description
-
-    return "**No interpretation available.**"
-    #return total_score, "No interpretation available."
+def score_bounds(test_name, answers):
+    """
+    Reachable score interval of every subscale from a partial set of answers.
+
+    Unanswered items are assumed to score anywhere between the lowest and
+    highest ``scoring`` value. A banded subscale's interpretation is known
+    once both ends of the interval fall in the same band; a subscale with a
+    fixed description is only known once all its items are answered, as its
+    result is the score itself.
+
+    Args:
+        test_name (str): The name of the test.
+        answers (dict): {item index: item score} for the items answered so far.
+
+    Returns:
+        dict: {subscale name: ((low, high), interpretation)}, where
+        interpretation is None while the remaining items could change it.
+    """
+    plan = SCORING_PLANS[test_name]
+    item_min, item_max = min(plan["scoring"]), max(plan["scoring"])
+
+    results = {}
+    for subscale in plan["subscales"]:
+        answered = sum(answers[i] for i in subscale["items"] if i in answers)
+        remaining = sum(i not in answers for i in subscale["items"])
+        low, high = answered + remaining * item_min, answered + remaining * item_max
+        if "description" in subscale:
+            determined = remaining == 0
+        else:
+            determined = _band_index(subscale, low) == _band_index(subscale, high)
+        results[subscale["name"]] = ((low, high), interpret_score(subscale, low) if determined else None)
+    return results
+
+
+def next_adaptive_item(test_name, answers):
+    """
+    The next item to ask in adaptive mode.
+
+    Items are asked in questionnaire order, skipping those that only feed
+    subscales whose interpretation is already determined.
+
+    Args:
+        test_name (str): The name of the test.
+        answers (dict): {item index: item score} for the items answered so far.
+
+    Returns:
+        int | None: An item index, or None once every subscale is determined.
+    """
+    bounds = score_bounds(test_name, answers)
+    pending = [i for subscale in SCORING_PLANS[test_name]["subscales"] if bounds[subscale["name"]][1] is None
+               for i in subscale["items"] if i not in answers]
+    return min(pending, default=None)
+
+
+def score_batch(test_name, responses, chunk_size=BATCH_CHUNK_ROWS):
+    """
+    Score a whole cohort at once.
+
+    Subscale totals are computed with one matrix product per chunk and
+    interpretation bands with ``np.searchsorted``, so memory-mapped input
+    (e.g. ``np.load(path, mmap_mode="r")``) is scored with bounded
+    temporary memory.
+
+    Args:
+        test_name (str): The name of the test.
+        responses (np.ndarray): (N respondents, items) integer array of
+            item scores, as for ``calculate_score``.
+        chunk_size (int): Respondents scored per chunk.
+
+    Returns:
+        dict: {subscale name: {"scores": int32 array (N,), "bands": int8
+        array (N,) indexing "labels", -1 where no interpretation applies,
+        "labels": tuple of descriptions}}.
+
+    Raises:
+        ValueError: If the array shape or values do not match the test.
+    """
+    plan = SCORING_PLANS[test_name]
+    if responses.ndim != 2 or responses.shape[1] != plan["n_items"]:
+        raise ValueError(f"{test_name} expects an (N, {plan['n_items']}) array, got {responses.shape}")
+    low, high = min(plan["scoring"]), max(plan["scoring"])
+
+    n, n_subscales = len(responses), len(plan["subscales"])
+    scores = np.empty((n_subscales, n), dtype=np.int32)
+    for start in range(0, n, chunk_size):
+        chunk = np.asarray(responses[start:start + chunk_size])
+        if chunk.size and (chunk.min() < low or chunk.max() > high):
+            raise ValueError(f"{test_name} item scores must be in {low}–{high} (rows {start}–{start + len(chunk) - 1})")
+        # float32 products of small integers are exact and go through BLAS
+        np.rint(chunk.astype(np.float32) @ plan["weights"], out=scores[:, start:start + len(chunk)].T, casting="unsafe")
+
+    results = {}
+    for subscale, subscale_scores in zip(plan["subscales"], scores):
+        if "description" in subscale:
+            bands = np.zeros(n, dtype=np.int8)
+            labels = (subscale["description"],)
+        else:
+            table = subscale["bands"]
+            bands = (np.searchsorted(table["lows"], subscale_scores, side="right") - 1).astype(np.int8)
+            bands[subscale_scores > np.asarray(table["highs"])[np.maximum(bands, 0)]] = -1
+            labels = table["labels"]
+        results[subscale["name"]] = {"scores": subscale_scores, "bands": bands, "labels": labels}
+    return results
+
 
 def check_score_range(range_str, score):
     """
     Helper function to check if a score falls within a given range.
-    
+
     Args:
         range_str (str): The range string (e.g., "0–4", "28+").
         score (int): The score to check.
-    
+
     Returns:
         bool: True if the score falls within the range, False otherwise.
     """
-    if "–" in range_str:
-        min_score, max_score = map(int, range_str.split("–"))
-        return min_score <= score <= max_score
-    elif "+" in range_str:
-        min_score = int(range_str.replace("+", ""))
-        return score >= min_score
-    else:  # Single value interpretation (e.g., SHI)
-        return score == int(range_str)
-
+    low, high = parse_score_range(range_str)
+    return low <= score <= high
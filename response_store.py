@@ -0,0 +1,239 @@
+"""
+Compact append-only storage for questionnaire responses.
+
+Responses are stored as option indices (0 for a test's first option), each
+packed into 1-3 bits according to the number of options. A file holds one
+test and starts with a header recording the format version, the test name
+and version (the "version" of its ``psychometric_tests.TESTS`` entry) and
+the test's structure: number of items, number of options and the score of
+each option. A file is only read while the test still has that version and
+structure, so responses recorded against differently ordered questions or
+options are never decoded as the same test, while rewording a question
+leaves stored responses readable. Rows are appended in blocks; within a
+block every item is stored as a column of bit planes, which NumPy packs and
+unpacks in bulk.
+
+File layout (little-endian):
+    header  magic "PSYR", u8 format version, u8 bits per answer,
+            u16 items, u8 options, u16 test version, u16 name length,
+            UTF-8 test name, then one u8 score per option
+    block   u32 rows, then for each item and each bit (least significant
+            first) ceil(rows / 8) bytes of np.packbits output
+"""
+import math
+import struct
+
+import numpy as np
+
+import psychometric_tests
+
+MAGIC = b"PSYR"
+FORMAT_VERSION = 1
+
+# Rows per block written by ResponseWriter.append, bounding temporary memory
+BLOCK_ROWS = 1 << 20
+
+_HEADER = struct.Struct("<4sBBHBHH")
+_BLOCK = struct.Struct("<I")
+
+# Longest possible header: the longest name and the most options
+_MAX_HEADER_SIZE = _HEADER.size + 0xFFFF + 0xFF
+
+
+def bits_per_answer(n_options):
+    """Bits needed to store an option index for ``n_options`` options."""
+    return max(1, math.ceil(math.log2(n_options)))
+
+
+def test_structure(test_name):
+    """The parts of a test's definition that stored option indices depend on."""
+    test_data = psychometric_tests.TESTS[test_name]
+    return {
+        "version": test_data["version"],
+        "items": len(test_data["questions"]),
+        "options": len(test_data["options"]),
+        "scoring": list(test_data["scoring"])
+    }
+
+
+def encode_header(test_name):
+    structure = test_structure(test_name)
+    name = test_name.encode("utf-8")
+    return (_HEADER.pack(MAGIC, FORMAT_VERSION, bits_per_answer(structure["options"]), structure["items"],
+                         structure["options"], structure["version"], len(name))
+            + name + bytes(structure["scoring"]))
+
+
+def decode_header(buffer):
+    """
+    Parse and validate a file header.
+
+    Returns:
+        tuple: (test name, header length in bytes).
+
+    Raises:
+        ValueError: If the header is malformed, from another format
+            version, or for another version or structure of the test.
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Not a response file: header is truncated")
+    magic, version, bits, n_items, n_options, test_version, name_length = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a response file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported response file version {version}")
+    name_end = _HEADER.size + name_length
+    end = name_end + n_options
+    if len(buffer) < end:
+        raise ValueError("Not a response file: header is truncated")
+    test_name = bytes(buffer[_HEADER.size:name_end]).decode("utf-8")
+    if test_name not in psychometric_tests.TESTS:
+        raise ValueError(f"Unknown test '{test_name}'")
+
+    expected = test_structure(test_name)
+    if test_version != expected["version"]:
+        raise ValueError(f"Responses were recorded with version {test_version} of '{test_name}', "
+                         f"which is now at version {expected['version']}")
+    recorded = {"version": test_version, "items": n_items, "options": n_options,
+                "scoring": list(bytes(buffer[name_end:end]))}
+    changed = [field for field in recorded if recorded[field] != expected[field]]
+    if changed or bits != bits_per_answer(n_options):
+        raise ValueError(f"Responses for version {test_version} of '{test_name}' were recorded with different "
+                         f"{', '.join(changed) or 'packing'}; the test's version should have been bumped")
+    return test_name, end
+
+
+def encode_block(test_name, options):
+    """
+    Bit-pack an (N, items) array of option indices into one block.
+
+    Raises:
+        ValueError: If the shape or an option index does not match the test.
+    """
+    test_data = psychometric_tests.TESTS[test_name]
+    n_items, n_options = len(test_data["questions"]), len(test_data["options"])
+    options = np.asarray(options)
+    if options.ndim != 2 or options.shape[1] != n_items:
+        raise ValueError(f"{test_name} expects an (N, {n_items}) array, got {options.shape}")
+    if options.size and (options.min() < 0 or options.max() >= n_options):
+        raise ValueError(f"{test_name} option indices must be in 0–{n_options - 1}")
+
+    columns = np.ascontiguousarray(options.T, dtype=np.uint8)
+    planes = [np.packbits((columns >> bit) & 1, axis=1) for bit in range(bits_per_answer(n_options))]
+    # (items, bits, bytes) so each item's bit planes are contiguous
+    return _BLOCK.pack(len(options)) + np.stack(planes, axis=1).tobytes()
+
+
+def _decode_block(buffer, offset, n_items, bits):
+    (rows,) = _BLOCK.unpack_from(buffer, offset)
+    offset += _BLOCK.size
+    row_bytes = (rows + 7) // 8
+    size = n_items * bits * row_bytes
+    if offset + size > len(buffer):
+        raise ValueError("Response file is truncated")
+    planes = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset).reshape(n_items, bits, row_bytes)
+    columns = np.unpackbits(planes[:, 0], axis=1, count=rows)
+    for bit in range(1, bits):
+        columns |= np.unpackbits(planes[:, bit], axis=1, count=rows) << bit
+    return columns.T, offset + size
+
+
+def _file_size(path):
+    with open(path, "rb") as f:
+        return f.seek(0, 2)
+
+
+def iter_blocks(path):
+    """
+    Decode a response file block by block.
+
+    Returns:
+        tuple: (test name, generator of (rows, items) uint8 option-index arrays).
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r") if _file_size(path) else b""
+    test_name, offset = decode_header(buffer)
+    test_data = psychometric_tests.TESTS[test_name]
+    n_items, bits = len(test_data["questions"]), bits_per_answer(len(test_data["options"]))
+
+    def blocks(offset=offset):
+        while offset < len(buffer):
+            options, offset = _decode_block(buffer, offset, n_items, bits)
+            yield options
+
+    return test_name, blocks()
+
+
+def read_options(path):
+    """
+    Read every response in a file.
+
+    Returns:
+        tuple: (test name, (N, items) uint8 array of option indices).
+    """
+    test_name, blocks = iter_blocks(path)
+    n_items = len(psychometric_tests.TESTS[test_name]["questions"])
+    return test_name, np.concatenate([np.empty((0, n_items), dtype=np.uint8), *blocks])
+
+
+def options_to_scores(test_name, options):
+    """Map option indices to item scores, ready for ``psychometric_tests.score_batch``."""
+    return np.asarray(psychometric_tests.TESTS[test_name]["scoring"], dtype=np.uint8)[options]
+
+
+def read_scores(path):
+    """
+    Read every response in a file as item scores.
+
+    Returns:
+        tuple: (test name, (N, items) uint8 array of item scores).
+    """
+    test_name, options = read_options(path)
+    return test_name, options_to_scores(test_name, options)
+
+
+class ResponseWriter:
+    """
+    Append responses for one test to a response file.
+
+    A new (or empty) file gets a header; an existing file must have been
+    written for the same test version. Data is only ever appended.
+
+    Args:
+        path (str): The response file.
+        test_name (str): A key of ``psychometric_tests.TESTS``.
+    """
+
+    def __init__(self, path, test_name):
+        self.test_name = test_name
+        self._file = open(path, "ab")
+        try:
+            if self._file.tell() == 0:
+                self._file.write(encode_header(test_name))
+            else:
+                with open(path, "rb") as existing:
+                    recorded, _ = decode_header(existing.read(_MAX_HEADER_SIZE))
+                if recorded != test_name:
+                    raise ValueError(f"{path} holds responses for '{recorded}', not '{test_name}'")
+        except BaseException:
+            self._file.close()
+            raise
+
+    def append(self, options):
+        """Append an (N, items) array (or one row) of option indices."""
+        options = np.asarray(options)
+        if options.ndim == 1:
+            options = options.reshape(1, -1)
+        for start in range(0, len(options), BLOCK_ROWS):
+            self._file.write(encode_block(self.test_name, options[start:start + BLOCK_ROWS]))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
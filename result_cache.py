@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_key(*parts):
+    """
+    Hash a recording (or other payload) together with its analysis parameters.
+
+    Args:
+        *parts: bytes-like objects, NumPy arrays, or values with a stable
+            ``repr`` (numbers, strings, None).
+
+    Returns:
+        str: A hex digest identifying the content.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"{part.dtype.str}{part.shape}".encode())
+            digest.update(memoryview(part).cast("B"))
+        elif isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe bounded LRU cache with age-based expiry.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    reached, and are treated as missing once older than ``max_age_s``.
+    Hit, miss and eviction counters are kept for monitoring.
+    """
+
+    def __init__(self, max_entries=128, max_age_s=3600.0):
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.max_age_s:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters and current size, e.g. for a status panel or logs."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+_MISSING = object()
@@ -0,0 +1,360 @@
+"""
+Sentiment backends for journal text.
+
+Every backend returns a polarity in [-1, 1] and a subjectivity in [0, 1]:
+
+``textblob``
+    The original pattern-based analyzer, ``TextBlob(text).sentiment``.
+``vader``
+    VADER (Hutto & Gilbert, 2014) over its lexicon, ``vader_lexicon.txt``
+    next to this module (MIT licensed, see ``vader_lexicon.LICENSE``) unless
+    VADER_LEXICON_PATH is set. It ships with the app, so scoring never waits
+    for a download. The lexicon is parsed once per process into a single
+    token -> valence dict, and texts are tokenized in one pass instead of
+    building every word/punctuation combination per call as nltk's analyzer
+    does.
+    Polarity is VADER's compound score; subjectivity is the share of
+    sentiment-bearing intensity (VADER's pos + neg).
+
+Long entries go through ``analyze_document``, which scores sentence by
+sentence behind ``SENTENCE_CACHE``, so re-analyzing an edited entry only
+scores the sentences that changed.
+
+Configured with environment variables:
+    SENTIMENT_BACKEND      default backend ("textblob" unless set)
+    VADER_LEXICON_PATH     VADER lexicon file (default vader_lexicon.txt)
+    SENTENCE_CACHE_SIZE    sentence scores kept (default 4096)
+    SENTENCE_CACHE_TTL_S   age limit of cached scores in seconds (default 3600)
+"""
+import functools
+import math
+import os
+import re
+import string
+
+import numpy as np
+
+from result_cache import ResultCache, content_key
+
+VADER_LEXICON_PATH = os.environ.get(
+    "VADER_LEXICON_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vader_lexicon.txt"))
+DEFAULT_SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "textblob")
+
+# Scores only, keyed by a hash of the sentence, so no journal text is retained
+SENTENCE_CACHE = ResultCache(
+    max_entries=int(os.environ.get("SENTENCE_CACHE_SIZE", 4096)),
+    max_age_s=float(os.environ.get("SENTENCE_CACHE_TTL_S", 3600))
+)
+
+# VADER's empirically derived constants
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+NORMALIZE_ALPHA = 15
+
+NEGATE = frozenset([
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite"
+])
+
+BOOSTERS = {
+    **dict.fromkeys([
+        "absolutely", "amazingly", "awfully", "completely", "considerably",
+        "decidedly", "deeply", "effing", "enormously", "entirely", "especially",
+        "exceptionally", "extremely", "fabulously", "flipping", "flippin",
+        "fricking", "frickin", "frigging", "friggin", "fully", "fucking",
+        "greatly", "hella", "highly", "hugely", "incredibly", "intensely",
+        "majorly", "more", "most", "particularly", "purely", "quite", "really",
+        "remarkably", "so", "substantially", "thoroughly", "totally",
+        "tremendously", "uber", "unbelievably", "unusually", "utterly", "very"
+    ], B_INCR),
+    **dict.fromkeys([
+        "almost", "barely", "hardly", "just enough", "kind of", "kinda",
+        "kindof", "kind-of", "less", "little", "marginally", "occasionally",
+        "partly", "scarcely", "slightly", "somewhat", "sort of", "sorta",
+        "sortof", "sort-of"
+    ], B_DECR)
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2,
+    "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2
+}
+
+# Punctuation VADER strips from either end of a word
+_EDGE_PUNCTUATION = frozenset([
+    ".", "!", "?", ",", ";", ":", "-", "'", '"', "!!", "!!!", "??", "???",
+    "?!?", "!?!", "?!?!", "!?!?"
+])
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+# Sentence boundaries: whitespace after ., ! or ? (optionally closing a quote or bracket), or a line break
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+|\s*\n\s*")
+_PUNCTUATION_CHARS = frozenset(string.punctuation)
+
+# First words of the multi-word idioms and boosters; texts without any skip phrase matching
+_PHRASE_STARTS = frozenset(phrase.split()[0] for phrase in [*SPECIAL_CASE_IDIOMS, *BOOSTERS] if " " in phrase)
+
+
+@functools.lru_cache(maxsize=1)
+def get_vader_lexicon():
+    """
+    The VADER lexicon as a {lowercase token: mean valence} dict, loaded once
+    per process from VADER_LEXICON_PATH.
+    """
+    lexicon = {}
+    with open(VADER_LEXICON_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                word, measure = line.strip().split("\t")[:2]
+                lexicon[word] = float(measure)
+    return lexicon
+
+
+def _tokenize(text):
+    """VADER's tokens: whitespace-split words of 2+ characters, edge punctuation removed."""
+    words = {w for w in _PUNCTUATION.sub("", text).split() if len(w) > 1}
+    tokens = []
+    for token in text.split():
+        if len(token) < 2:
+            continue
+        if token[0] in _PUNCTUATION_CHARS or token[-1] in _PUNCTUATION_CHARS:
+            token = _strip_edge_punctuation(token, words)
+        tokens.append(token)
+    return tokens
+
+
+def _strip_edge_punctuation(token, words):
+    for k in range(1, 5):
+        if token[-k:] in _EDGE_PUNCTUATION and token[:-k] in words:
+            return token[:-k]
+        if token[:k] in _EDGE_PUNCTUATION and token[k:] in words:
+            return token[k:]
+    return token
+
+
+def _negated(word):
+    word = word.lower()
+    return word in NEGATE or "n't" in word
+
+
+def _booster(word, valence, is_cap_diff):
+    scalar = BOOSTERS.get(word.lower(), 0.0)
+    if scalar:
+        if valence < 0:
+            scalar = -scalar
+        if is_cap_diff and word.isupper():
+            scalar += C_INCR if valence > 0 else -C_INCR
+    return scalar
+
+
+def _never_check(valence, tokens, start_i, i):
+    if start_i == 0:
+        if _negated(tokens[i - 1]):
+            valence *= N_SCALAR
+    elif start_i == 1:
+        if tokens[i - 2] == "never" and tokens[i - 1] in ("so", "this"):
+            valence *= 1.5
+        elif _negated(tokens[i - 2]):
+            valence *= N_SCALAR
+    else:
+        if (tokens[i - 3] == "never" and tokens[i - 2] in ("so", "this")) or tokens[i - 1] in ("so", "this"):
+            valence *= 1.25
+        elif _negated(tokens[i - 3]):
+            valence *= N_SCALAR
+    return valence
+
+
+def _idioms_check(valence, tokens, i):
+    sequences = [
+        f"{tokens[i - 1]} {tokens[i]}",
+        f"{tokens[i - 2]} {tokens[i - 1]} {tokens[i]}",
+        f"{tokens[i - 2]} {tokens[i - 1]}",
+        f"{tokens[i - 3]} {tokens[i - 2]} {tokens[i - 1]}",
+        f"{tokens[i - 3]} {tokens[i - 2]}"
+    ]
+    for sequence in sequences:
+        if sequence in SPECIAL_CASE_IDIOMS:
+            valence = SPECIAL_CASE_IDIOMS[sequence]
+            break
+    if len(tokens) - 1 > i:
+        sequence = f"{tokens[i]} {tokens[i + 1]}"
+        valence = SPECIAL_CASE_IDIOMS.get(sequence, valence)
+    if len(tokens) - 1 > i + 1:
+        sequence = f"{tokens[i]} {tokens[i + 1]} {tokens[i + 2]}"
+        valence = SPECIAL_CASE_IDIOMS.get(sequence, valence)
+    if sequences[4] in BOOSTERS or sequences[2] in BOOSTERS:
+        valence += B_DECR
+    return valence
+
+
+def _token_valences(tokens, lexicon):
+    lowers = [t.lower() for t in tokens]
+    n_caps = sum(t.isupper() for t in tokens)
+    is_cap_diff = 0 < len(tokens) - n_caps < len(tokens)
+    phrases = not _PHRASE_STARTS.isdisjoint(tokens)
+
+    valences = []
+    for i, (token, lower) in enumerate(zip(tokens, lowers)):
+        valence = lexicon.get(lower)
+        if valence is None or lower in BOOSTERS or (lower == "kind" and i + 1 < len(tokens) and lowers[i + 1] == "of"):
+            valences.append(0.0)
+            continue
+
+        if is_cap_diff and token.isupper():
+            valence += C_INCR if valence > 0 else -C_INCR
+        for start_i, damping in enumerate((1.0, 0.95, 0.9)):
+            if i > start_i and lowers[i - start_i - 1] not in lexicon:
+                valence += _booster(tokens[i - start_i - 1], valence, is_cap_diff) * damping
+                valence = _never_check(valence, tokens, start_i, i)
+                if start_i == 2 and phrases:
+                    valence = _idioms_check(valence, tokens, i)
+
+        # "least" negates unless it is "at least" / "very least"
+        if i > 0 and lowers[i - 1] == "least" and "least" not in lexicon:
+            if i == 1 or lowers[i - 2] not in ("at", "very"):
+                valence *= N_SCALAR
+        valences.append(valence)
+
+    # Clauses after "but" dominate those before it
+    if "but" in lowers:
+        but = lowers.index("but")
+        valences = [v * 0.5 if j < but else v * 1.5 if j > but else v for j, v in enumerate(valences)]
+    return valences
+
+
+def vader_scores(text, lexicon=None):
+    """
+    VADER sentiment of one text.
+
+    Args:
+        text (str): The text to score.
+        lexicon (dict): A lexicon from ``get_vader_lexicon``; loaded if omitted.
+
+    Returns:
+        dict: "neg", "neu" and "pos" proportions and the "compound" score in [-1, 1].
+    """
+    lexicon = get_vader_lexicon() if lexicon is None else lexicon
+    valences = _token_valences(_tokenize(text), lexicon)
+    if not valences:
+        return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+
+    # Emphasis from exclamation and question marks
+    question_marks = text.count("?")
+    emphasis = min(text.count("!"), 4) * 0.292
+    if question_marks > 1:
+        emphasis += question_marks * 0.18 if question_marks <= 3 else 0.96
+
+    total = sum(valences)
+    if total:
+        total += emphasis if total > 0 else -emphasis
+    compound = total / math.sqrt(total * total + NORMALIZE_ALPHA)
+
+    pos = sum(v + 1 for v in valences if v > 0)
+    neg = sum(v - 1 for v in valences if v < 0)
+    neutral = sum(v == 0 for v in valences)
+    if pos > -neg:
+        pos += emphasis
+    elif pos < -neg:
+        neg -= emphasis
+    scale = pos - neg + neutral
+    return {"neg": -neg / scale, "neu": neutral / scale, "pos": pos / scale, "compound": compound}
+
+
+def _vader_sentiment(text):
+    scores = vader_scores(text)
+    return scores["compound"], scores["pos"] + scores["neg"]
+
+
+def _textblob_sentiment(text):
+    from textblob import TextBlob
+
+    sentiment = TextBlob(text).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+
+SENTIMENT_BACKENDS = {"textblob": _textblob_sentiment, "vader": _vader_sentiment}
+
+
+def get_sentiment_backend(backend=None):
+    """Look up a sentiment backend by name (default ``DEFAULT_SENTIMENT_BACKEND``)."""
+    backend = backend or DEFAULT_SENTIMENT_BACKEND
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{backend}'. Choose from: {', '.join(SENTIMENT_BACKENDS)}")
+    return SENTIMENT_BACKENDS[backend]
+
+
+def analyze_sentiment(text, backend=None):
+    """
+    Polarity and subjectivity of a text.
+
+    Args:
+        text (str): The text to score.
+        backend (str): A key of ``SENTIMENT_BACKENDS``.
+
+    Returns:
+        tuple: (polarity in [-1, 1], subjectivity in [0, 1]).
+    """
+    return get_sentiment_backend(backend)(text)
+
+
+def analyze_sentiment_batch(texts, backend=None):
+    """
+    Score many texts, e.g. a history of journal entries.
+
+    Args:
+        texts (iterable): The texts to score.
+        backend (str): A key of ``SENTIMENT_BACKENDS``.
+
+    Returns:
+        dict: "polarity" and "subjectivity" float arrays, one value per text.
+    """
+    score = get_sentiment_backend(backend)
+    scores = np.array([score(text) for text in texts], dtype=np.float64).reshape(-1, 2)
+    return {"polarity": scores[:, 0], "subjectivity": scores[:, 1]}
+
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation and line breaks."""
+    return [sentence for sentence in (part.strip() for part in _SENTENCE_BREAK.split(text)) if sentence]
+
+
+def analyze_document(text, backend=None):
+    """
+    Sentence-level sentiment of a (long) text.
+
+    Each sentence is scored once and cached by its hash and the backend, so
+    after an edit only new or changed sentences are scored again.
+
+    Args:
+        text (str): The text to score.
+        backend (str): A key of ``SENTIMENT_BACKENDS``.
+
+    Returns:
+        dict: Document "polarity" and "subjectivity" (sentence scores
+        weighted by word count) and "sentences", the per-sentence
+        trajectory as a list of {"text", "polarity", "subjectivity"}.
+    """
+    backend = backend or DEFAULT_SENTIMENT_BACKEND
+    score = get_sentiment_backend(backend)
+
+    trajectory = []
+    for sentence in split_sentences(text):
+        polarity, subjectivity = SENTENCE_CACHE.get_or_compute(
+            content_key(sentence, backend), lambda sentence=sentence: score(sentence))
+        trajectory.append({"text": sentence, "polarity": polarity, "subjectivity": subjectivity})
+
+    if not trajectory:
+        return {"polarity": 0.0, "subjectivity": 0.0, "sentences": []}
+    weights = np.array([len(entry["text"].split()) for entry in trajectory], dtype=np.float64)
+    return {
+        "polarity": float(np.average([entry["polarity"] for entry in trajectory], weights=weights)),
+        "subjectivity": float(np.average([entry["subjectivity"] for entry in trajectory], weights=weights)),
+        "sentences": trajectory
+    }
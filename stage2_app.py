@@ -1,12 +1,13 @@
 import streamlit as st
-import numpy as np
-import librosa
 import psychometric_tests
+from app_components import adaptive_questionnaire, score_responses, show_voice_results
+from color_mood import dominant_colors, mood_for_color
+from voice_workers import QueueFullError, submit_voice_analysis
 from st_audiorec import st_audiorec
-from textblob import TextBlob
-import nltk
-from PIL import Image, ImageDraw
-from transformers import pipeline
+import sentiment
+import text_emotions
+import model_store
+import face_analysis
 
 # Configure page
 st.set_page_config(
@@ -15,136 +16,87 @@ st.set_page_config(
     layout="wide"
 )
 
-# Download NLTK resources
-@st.cache_resource
-def download_nltk_resources():
-    nltk.download('vader_lexicon', quiet=True)
-
-download_nltk_resources()
-
-# Load models
-@st.cache_resource
-def load_models():
-    detector = pipeline("object-detection", model="facebook/detr-resnet-50")
-    classifier = pipeline("image-classification", model="Rajaram1996/FacialEmoRecog")
-    return detector, classifier
-
-face_detector, emotion_classifier = load_models()
-
-COLOR_MOOD_MAP = {
-    'red': 'Angry/Passionate',
-    'blue': 'Calm/Peaceful',
-    'green': 'Balanced/Hopeful',
-    'yellow': 'Happy/Energetic',
-    'orange': 'Excited/Enthusiastic',
-    'purple': 'Creative/Mysterious',
-    'pink': 'Loving/Playful',
-    'brown': 'Stable/Grounded',
-    'black': 'Depressed/Anxious',
-    'white': 'Pure/Innocent',
-    'gray': 'Neutral/Indifferent',
-    'teal': 'Refreshed/Calm',
-    'magenta': 'Bold/Innovative',
-    'lavender': 'Relaxed/Serene',
-    'gold': 'Joyful/Optimistic',
-    'silver': 'Calm/Reflective',
-    'turquoise': 'Refreshed/Calm',
-    'maroon': 'Serious/Disciplined',
-    'navy': 'Trusting/Reliable',
-    'beige': 'Comfortable/Relaxed'
-}
-
-def hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip("#")
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def find_nearest_color(selected_hex, simple_colors):
-    selected_rgb = hex_to_rgb(selected_hex)
-    min_distance = float("inf")
-    nearest_color = "gray"
-
-    for hex_code, color_name in simple_colors.items():
-        color_rgb = hex_to_rgb(hex_code)
-        distance = np.linalg.norm(np.array(selected_rgb) - np.array(color_rgb))
-        if distance < min_distance:
-            min_distance = distance
-            nearest_color = color_name
-
-    return nearest_color
-
-def analyze_voice(audio_file):
-    y, sr = librosa.load(audio_file, sr=None)
-    pitch = librosa.yin(y, fmin=50, fmax=2000)
-    pitch = pitch[pitch > 0]
-
-    if len(pitch) == 0:
-        return "No speech detected in audio"
-
-    mean_pitch = np.mean(pitch)
-    pitch_std = np.std(pitch)
-    voiced_frames_ratio = len(pitch) / len(y) * 100
-
-    interpretation = []
-    if mean_pitch < 85:
-        interpretation.append("low pitch (possibly indicating sadness, fatigue, or depression)")
-    elif 85 <= mean_pitch < 165:
-        interpretation.append("moderate pitch (typical for calm, relaxed speech)")
-    elif 165 <= mean_pitch < 255:
-        interpretation.append("elevated pitch (could indicate stress or anxiety)")
-    elif 255 <= mean_pitch < 350:
-        interpretation.append("high pitch (may suggest excitement or anxiety)")
-    else:
-        interpretation.append("very high pitch (could indicate strong emotions)")
-
-    if pitch_std < 15:
-        interpretation.append("monotonous speech (possibly indicating depression or fatigue)")
-    elif 15 <= pitch_std < 30:
-        interpretation.append("normal pitch variation")
+def render_voice_results(job):
+    try:
+        voice_results = job.result()
+    except Exception as e:
+        st.error(f"Voice analysis failed: {e}")
+        return
+
+    if isinstance(voice_results, dict):
+        st.write(f"Average pitch: {voice_results['mean_pitch_hz']} Hz")
+        st.write(f"Speech continuity: {voice_results['voiced_speech_percent']}% voiced")
+        st.write(f"Pauses: {voice_results['pause_count']} (average {voice_results['mean_pause_s']} s)")
+        st.write("Interpretations:")
+        for item in voice_results['interpretation']:
+            st.write(f"- {item.capitalize()}")
     else:
-        interpretation.append("high pitch variability (may suggest emotional stress or excitement)")
-
-    if voiced_frames_ratio < 60:
-        interpretation.append("frequent pauses (could indicate anxiety or cognitive load)")
-    elif 60 <= voiced_frames_ratio < 80:
-        interpretation.append("normal speech flow")
-    else:
-        interpretation.append("rapid speech (may suggest excitement or stress)")
-
-    return {
-        "mean_pitch_hz": round(float(mean_pitch), 1),
-        "pitch_variability": round(float(pitch_std), 1),
-        "voiced_speech_percent": round(voiced_frames_ratio, 1),
-        "interpretation": interpretation
-    }
-
-def detect_and_analyze_faces(image):
-    results = face_detector(image)
-    draw = ImageDraw.Draw(image)
-    emotions = []
+        st.warning(voice_results)
+
+
+# A fragment, so the report (and its voice polling) re-executes on its own
+@st.fragment
+def general_report_panel():
+    report = st.session_state.general_report
+    with st.container(border=True):
+        st.subheader("General Analysis Report")
+        st.write(f"**Color Mood**: {report['color_mood']}")
+
+        polarity = report["polarity"]
+        st.write(f"**Text Sentiment**: {'Positive' if polarity > 0 else 'Negative' if polarity < 0 else 'Neutral'}")
+        if len(report["trajectory"]) > 1:
+            st.line_chart(report["trajectory"], height=160)
+        st.write(f"**Text Emotions**: {report['emotions']['dominant'] or 'None detected'}")
+        if report["emotions"]["dominant"] is not None:
+            st.bar_chart(report["emotions"]["intensities"], height=200)
+
+        st.write("**Psychometric Assessment**:")
+        for subscale, (score, interpretation) in report["psychometric"].items():
+            label = "Score" if subscale == psychometric_tests.TOTAL_SCALE else subscale
+            st.write(f"- {label}: {score} ({interpretation})")
+
+        st.write("**Voice Analysis**:")
+        if st.session_state.get("voice_job") is not None:
+            show_voice_results(st.session_state.voice_job, render_voice_results)
+
+
+# A fragment, so uploading a photo reruns only this tab
+@st.fragment
+def face_analysis_tab():
+    st.subheader("Advanced Facial Emotion Analysis")
+    uploaded_file = st.file_uploader("📸 Upload a photo for analysis", 
+                                   type=["jpg", "jpeg", "png"])
     
-    for result in results:
-        if result['label'] == 'person' and result['score'] > 0.9:
-            box = result['box']
-            xmin, ymin, xmax, ymax = box.values()
-            
-            # Crop face region
-            face = image.crop((xmin, ymin, xmax, ymax))
-            
-            # Analyze emotion
-            emotion_result = emotion_classifier(face)
-            top_emotion = emotion_result[0]['label']
-            
-            # Draw bounding box and label
-            draw.rectangle([xmin, ymin, xmax, ymax], outline="red", width=2)
-            draw.text((xmin, ymin-20), top_emotion, fill="red")
-            
-            emotions.append({
-                "position": (xmin, ymin, xmax-xmin, ymax-ymin),
-                "emotion": top_emotion,
-                "confidence": emotion_result[0]['score']
-            })
-    
-    return image, emotions
+    face_detector = st.radio("Face detector", list(face_analysis.FACE_DETECTORS), horizontal=True,
+                             index=list(face_analysis.FACE_DETECTORS).index(face_analysis.DEFAULT_FACE_DETECTOR))
+    missing = face_analysis.missing_models(face_detector)
+    if missing:
+        st.error(f"Face analysis is unavailable: {', '.join(missing)} not found in {model_store.MODEL_DIR}. "
+                 "Run `python model_store.py fetch` to download the models.")
+    elif uploaded_file is not None:
+        image, original_size = face_analysis.load_photo(uploaded_file)
+        # Before detection, which draws the face boxes onto the image
+        photo_colors = dominant_colors(image)
+        processed_image, face_results = face_analysis.detect_and_analyze_faces(image, original_size, face_detector)
+        
+        st.image(processed_image, caption="Processed Image with Emotion Detection")
+        
+        if face_results:
+            st.write("**Detected Emotions**:")
+            for i, face in enumerate(face_results):
+                st.write(f"""
+                - Face {i+1}:
+                    - Position: {face['position']}
+                    - Emotion: {face['emotion']}
+                    - Confidence: {face['confidence']:.2%}
+                """)
+        else:
+            st.warning("No faces detected in the image")
+
+        st.write("**Photo Color Mood**:")
+        for entry in photo_colors:
+            st.write(f"- {entry['color'].capitalize()} ({entry['share']:.0%}): {entry['mood']}")
+
 
 def main():
     st.markdown("""
@@ -166,21 +118,35 @@ def main():
     with tab1:
         st.subheader("Basic Emotional Assessment")
         
-        color = st.color_picker("🎨 Select a color representing your mood", "#0000ff")
-        journal_text = st.text_area("📝 Write about how you are feeling (min 50 characters)", height=100)
+        # The test choice stays outside the form so switching tests redraws the questions
         selected_test = st.selectbox("📊 Choose a psychometric test:", 
                                    list(psychometric_tests.TESTS.keys()), 
                                    index=7)
-        responses = []
-        with st.container(border=True, height=300):
-            test_data = psychometric_tests.TESTS[selected_test]
-            for i, question in enumerate(test_data["questions"]):
-                response = st.radio(
-                    f"{i + 1}. {question}",
-                    options=test_data["options"],
-                    key=f"gen_q{i}"
-                )
-                responses.append(test_data["scoring"][test_data["options"].index(response)])
+        adaptive = st.toggle("Adaptive mode: one question at a time, stopping once the result is certain")
+
+        # Submitted together, so filling them in does not rerun the whole script
+        with st.form("general_inputs", border=False):
+            color = st.color_picker("🎨 Select a color representing your mood", "#0000ff")
+            journal_text = st.text_area("📝 Write about how you are feeling (min 50 characters)", height=100)
+            sentiment_backend = st.radio("Sentiment engine", list(sentiment.SENTIMENT_BACKENDS), horizontal=True,
+                                         index=list(sentiment.SENTIMENT_BACKENDS).index(sentiment.DEFAULT_SENTIMENT_BACKEND))
+            if not adaptive:
+                with st.container(border=True, height=300):
+                    test_data = psychometric_tests.TESTS[selected_test]
+                    responses = []
+                    for i, question in enumerate(test_data["questions"]):
+                        response = st.radio(
+                            f"{i + 1}. {question}",
+                            options=test_data["options"],
+                            key=f"gen_q{i}"
+                        )
+                        responses.append(test_data["scoring"][test_data["options"].index(response)])
+            st.form_submit_button("Save responses")
+
+        # Adaptive mode needs callbacks, which forms do not allow
+        if adaptive:
+            with st.container(border=True, height=300):
+                responses = adaptive_questionnaire(selected_test, psychometric_tests.TESTS[selected_test], "gen_adaptive")
 
         wav_audio_data = st_audiorec()
         if wav_audio_data is not None:
@@ -197,6 +163,9 @@ def main():
                 if not wav_audio_data:
                     st.error("Voice recording required")
                     valid = False
+                if responses is None:
+                    st.error("Please finish the questionnaire")
+                    valid = False
                 if valid:
                     st.session_state.general_valid = True
                     st.success("All general tests validated!")
@@ -205,60 +174,25 @@ def main():
             if st.button("📄 Generate General Report", 
                         disabled=not st.session_state.get('general_valid', False),
                         type="primary"):
-                with st.container(border=True):
-                    st.subheader("General Analysis Report")
-                    color_hex = color.lstrip("#").lower()
-                    simple_colors = {
-                        "ff0000": "red", "0000ff": "blue", "00ff00": "green",
-                        "ffff00": "yellow", "ffa500": "orange", "800080": "purple",
-                        "ffc0cb": "pink", "a52a2a": "brown", "000000": "black",
-                        "ffffff": "white", "808080": "gray", "008080": "teal",
-                        "ff00ff": "magenta", "e6e6fa": "lavender", "ffd700": "gold",
-                        "c0c0c0": "silver", "40e0d0": "turquoise", "800000": "maroon",
-                        "000080": "navy", "f5f5dc": "beige"
-                    }
-                    nearest_color = find_nearest_color(color_hex, simple_colors)
-                    st.write(f"**Color Mood**: {COLOR_MOOD_MAP.get(nearest_color, 'Unknown')}")
-
-                    analysis = TextBlob(journal_text)
-                    polarity = analysis.sentiment.polarity
-                    st.write(f"**Text Sentiment**: {'Positive' if polarity > 0 else 'Negative' if polarity < 0 else 'Neutral'}")
-
-                    test_results = psychometric_tests.calculate_score(selected_test, responses)
-                    st.write("**Psychometric Assessment**:")
-                    st.write(test_results)
-
-                    with open("temp_audio.wav", "wb") as f:
-                        f.write(wav_audio_data)
-                    voice_results = analyze_voice("temp_audio.wav")
-                    st.write("**Voice Analysis**:")
-                    st.write(f"Average pitch: {voice_results['mean_pitch_hz']} Hz")
-                    st.write("Interpretations:")
-                    for item in voice_results['interpretation']:
-                        st.write(f"- {item.capitalize()}")
+                text_sentiment = sentiment.analyze_document(journal_text, sentiment_backend)
+                st.session_state.general_report = {
+                    "color_mood": mood_for_color(color),
+                    "polarity": text_sentiment["polarity"],
+                    "trajectory": [entry["polarity"] for entry in text_sentiment["sentences"]],
+                    "emotions": text_emotions.analyze_emotions(journal_text),
+                    "psychometric": score_responses(selected_test, responses, adaptive)
+                }
+                try:
+                    st.session_state.voice_job = submit_voice_analysis(wav_audio_data)
+                except QueueFullError as e:
+                    st.session_state.voice_job = None
+                    st.warning(str(e))
+
+        if st.session_state.get("general_report") is not None:
+            general_report_panel()
 
     with tab2:
-        st.subheader("Advanced Facial Emotion Analysis")
-        uploaded_file = st.file_uploader("📸 Upload a photo for analysis", 
-                                       type=["jpg", "jpeg", "png"])
-        
-        if uploaded_file is not None:
-            image = Image.open(uploaded_file).convert("RGB")
-            processed_image, face_results = detect_and_analyze_faces(image)
-            
-            st.image(processed_image, caption="Processed Image with Emotion Detection")
-            
-            if face_results:
-                st.write("**Detected Emotions**:")
-                for i, face in enumerate(face_results):
-                    st.write(f"""
-                    - Face {i+1}:
-                        - Position: {face['position']}
-                        - Emotion: {face['emotion']}
-                        - Confidence: {face['confidence']:.2%}
-                    """)
-            else:
-                st.warning("No faces detected in the image")
+        face_analysis_tab()
 
 if __name__ == "__main__":
     main()
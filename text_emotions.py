@@ -0,0 +1,194 @@
+"""
+Ekman emotions in journal text from a word-emotion lexicon.
+
+The lexicon (``ekman_lexicon.tsv`` unless EKMAN_LEXICON_PATH is set) lists
+words and multi-word phrases, each with one of the six Ekman emotions and a
+weight. It is compiled once per process into an Aho-Corasick automaton over
+tokens, so a text is scored in a single left-to-right pass however many
+terms the lexicon holds: every token advances the automaton, which reports
+the longest term ending there. A term inside a longer matched term counts
+only as part of it. A term within ``NEGATION_WINDOW`` words after a negation
+("not", "never", "don't", ...) in the same clause is counted as negated and
+adds nothing.
+"""
+import functools
+import os
+import re
+
+import numpy as np
+
+from sentiment import NEGATE
+
+EMOTIONS = ("anger", "disgust", "fear", "happiness", "sadness", "surprise")
+DEFAULT_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ekman_lexicon.tsv")
+
+# Words after a negation that it still applies to
+NEGATION_WINDOW = 3
+NEGATIONS = NEGATE | {"no"}
+
+# Words (with an optional contraction) and the punctuation that ends a clause
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;:,]")
+
+
+def tokenize(text):
+    """Lowercase word tokens, with clause punctuation kept as separate tokens."""
+    return _TOKEN.findall(text.lower().replace("’", "'"))
+
+
+def load_lexicon(path):
+    """
+    Read a lexicon file: tab-separated term, emotion and weight per line,
+    with ``#`` comments.
+
+    Returns:
+        dict: {term as a tuple of tokens: {emotion: weight}}.
+
+    Raises:
+        ValueError: If a line is malformed or names an unknown emotion.
+    """
+    lexicon = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                term, emotion, weight = line.split("\t")
+                weight = float(weight)
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: expected 'term<TAB>emotion<TAB>weight'") from None
+            if emotion not in EMOTIONS:
+                raise ValueError(f"{path}:{line_number}: unknown emotion '{emotion}'")
+            tokens = tuple(tokenize(term))
+            lexicon.setdefault(tokens, {})[emotion] = weight
+    return lexicon
+
+
+def compile_matcher(lexicon):
+    """
+    Compile a lexicon into an Aho-Corasick automaton over tokens.
+
+    Returns:
+        dict: "goto", a {token: state} dict per state; "fail", each state's
+        failure link; and "output", for each state None or the (term length,
+        ((emotion index, weight), ...)) of the longest term ending there;
+        and "longest", the most tokens in a term.
+    """
+    goto, output = [{}], [None]
+    for tokens, weights in lexicon.items():
+        state = 0
+        for token in tokens:
+            if token not in goto[state]:
+                goto.append({})
+                output.append(None)
+                goto[state][token] = len(goto) - 1
+            state = goto[state][token]
+        output[state] = (len(tokens), tuple((EMOTIONS.index(e), w) for e, w in weights.items()))
+
+    # Breadth-first, so a state's failure link (a shorter suffix) is final before its children's
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for token, child in goto[state].items():
+            link = fail[state]
+            while link and token not in goto[link]:
+                link = fail[link]
+            fail[child] = goto[link].get(token, 0)
+            if output[child] is None:
+                output[child] = output[fail[child]]
+            queue.append(child)
+    longest = max(map(len, lexicon), default=1)
+    return {"goto": goto, "fail": fail, "output": output, "longest": longest}
+
+
+@functools.lru_cache(maxsize=1)
+def get_emotion_matcher():
+    """The compiled default lexicon, built once per process."""
+    return compile_matcher(load_lexicon(os.environ.get("EKMAN_LEXICON_PATH", DEFAULT_LEXICON)))
+
+
+def _score_tokens(tokens, matcher):
+    """One pass over the tokens; returns (per-emotion scores, matches, negated matches)."""
+    goto, fail, output = matcher["goto"], matcher["fail"], matcher["output"]
+    scores = [0.0] * len(EMOTIONS)
+    counts = [0, 0]  # matches, negated matches
+    negations = []  # word positions of negations in the current clause
+    recent = []  # (start, weights, negated) of matches a longer term may still cover
+    state = position = 0
+
+    for token in tokens:
+        if len(token) == 1 and token in ".!?;:,":
+            state = 0
+            negations.clear()
+            recent.clear()
+            continue
+        if token in NEGATIONS or token.endswith("n't"):
+            negations.append(position)
+
+        while state and token not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(token, 0)
+
+        if output[state] is not None:
+            length, weights = output[state]
+            start = position - length + 1
+            # A term inside a longer one ("broken" in "broken hearted") only counts as part of it
+            while recent and recent[-1][0] >= start:
+                _, covered, was_negated = recent.pop()
+                counts[was_negated] -= 1
+                if not was_negated:
+                    for emotion, weight in covered:
+                        scores[emotion] -= weight
+            is_negated = any(0 < start - p <= NEGATION_WINDOW for p in negations)
+            counts[is_negated] += 1
+            if not is_negated:
+                for emotion, weight in weights:
+                    scores[emotion] += weight
+            recent.append((start, weights, is_negated))
+            del recent[:-matcher["longest"]]
+        position += 1
+    return scores, counts[0], counts[1]
+
+
+def analyze_emotions(text, matcher=None):
+    """
+    Score a text for the six Ekman emotions.
+
+    Args:
+        text (str): The text to score.
+        matcher (dict): A ``compile_matcher`` result; the default lexicon if omitted.
+
+    Returns:
+        dict: "scores", the summed lexicon weight per emotion;
+        "intensities", each emotion's share of that total (all 0.0 when
+        nothing matched); "dominant", the strongest emotion or None; and
+        "matches" / "negated", the number of terms counted and skipped.
+    """
+    scores, matches, negated = _score_tokens(tokenize(text), matcher or get_emotion_matcher())
+    total = sum(scores)
+    return {
+        "scores": dict(zip(EMOTIONS, scores)),
+        "intensities": {emotion: score / total if total else 0.0 for emotion, score in zip(EMOTIONS, scores)},
+        "dominant": EMOTIONS[scores.index(max(scores))] if total else None,
+        "matches": matches,
+        "negated": negated
+    }
+
+
+def analyze_emotions_batch(texts, matcher=None):
+    """
+    Score many texts against one compiled matcher.
+
+    Returns:
+        dict: "scores" and "intensities" as (N, 6) float32 arrays with
+        columns in ``EMOTIONS`` order, and "matches" as an (N,) int32 array.
+    """
+    matcher = matcher or get_emotion_matcher()
+    scores = np.zeros((len(texts), len(EMOTIONS)), dtype=np.float32)
+    matches = np.zeros(len(texts), dtype=np.int32)
+    for i, text in enumerate(texts):
+        row, matches[i], _ = _score_tokens(tokenize(text), matcher)
+        scores[i] = row
+    totals = scores.sum(axis=1, keepdims=True)
+    intensities = np.divide(scores, totals, out=np.zeros_like(scores), where=totals > 0)
+    return {"scores": scores, "intensities": intensities, "matches": matches}
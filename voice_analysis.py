@@ -0,0 +1,803 @@
+import copy
+import functools
+import os
+import struct
+
+import numpy as np
+import soxr
+
+from result_cache import ResultCache, content_key
+
+# WAVE format tags (fmt chunk "audio_format" field)
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Analysis profiles: sample rate to analyze at (None keeps the recording's
+# native rate), YIN pitch search range in Hz and YIN frame length in samples.
+# The hop is a quarter frame, as in librosa.
+ANALYSIS_PROFILES = {
+    "full": {"sr": None, "fmin": 50, "fmax": 2000, "frame_length": 2048},
+    "fast_speech": {"sr": 16000, "fmin": 60, "fmax": 500, "frame_length": 1024},
+}
+DEFAULT_PROFILE = os.environ.get("VOICE_ANALYSIS_PROFILE", "full")
+
+# Pitch tracker used for the speech frames (see PITCH_BACKENDS)
+DEFAULT_PITCH_BACKEND = os.environ.get("VOICE_PITCH_BACKEND", "yin")
+
+# ACF tracker: take the shortest-lag autocorrelation peak within this
+# fraction of the strongest one, which avoids octave-down errors
+ACF_PEAK_RATIO = 0.9
+
+# Process-wide cache of analyze_voice results, shared by all sessions
+VOICE_CACHE = ResultCache(
+    max_entries=int(os.environ.get("VOICE_CACHE_SIZE", 128)),
+    max_age_s=float(os.environ.get("VOICE_CACHE_TTL_S", 3600))
+)
+
+# Streaming block size in samples
+STREAM_BLOCK_SIZE = 2 ** 17
+
+# Voice-activity detection: a frame is voiced speech when its energy is above
+# the silence floor and within VAD_DYNAMIC_RANGE_DB of the loudest frame, and
+# its zero-crossing rate is low (fricatives and noise cross far more often).
+VAD_SILENCE_DB = -50.0
+VAD_DYNAMIC_RANGE_DB = 35.0
+VAD_MAX_CROSSINGS_PER_S = 3000
+VAD_MAX_GAP_FRAMES = 2
+
+# Recordings rejected before any pitch tracking
+MIN_DURATION_S = 1.0
+MIN_SPEECH_S = 0.5
+CLIP_LEVEL = 0.999
+MAX_CLIPPED_FRACTION = 0.01
+
+# Silences between two speech spans shorter than this are not counted as pauses
+MIN_PAUSE_S = 0.2
+
+
+def _parse_wav_header(buffer):
+    """
+    Walk the RIFF chunks of a WAV buffer without copying the sample data.
+
+    Args:
+        buffer (memoryview): The complete WAV file contents.
+
+    Returns:
+        tuple: (audio_format, channels, sample_rate, bits_per_sample,
+        data_offset, data_length).
+    """
+    if len(buffer) < 12 or buffer[0:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+        raise ValueError("Audio is not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(buffer):
+        chunk_id = bytes(buffer[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", buffer, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", buffer, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format tag is the first two bytes of the sub-format GUID
+                audio_format = struct.unpack_from("<H", buffer, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk found before fmt chunk")
+            # Recorders that stream their output often leave the size unset
+            data_length = min(chunk_size, len(buffer) - body)
+            return fmt + (body, data_length)
+
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def _pcm_view(buffer, audio_format, bits, offset, length):
+    """Return the raw samples as a NumPy view over ``buffer`` where the layout allows it."""
+    width = bits // 8
+    length -= length % width
+    data = buffer[offset:offset + length]
+
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        return np.frombuffer(data, dtype=f"<f{width}")
+    if audio_format == WAVE_FORMAT_PCM:
+        if bits == 8:
+            return np.frombuffer(data, dtype=np.uint8)
+        if bits in (16, 32):
+            return np.frombuffer(data, dtype=f"<i{width}")
+        if bits == 24:
+            # No native 24-bit dtype: widen into the top three bytes of an int32
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+            wide = np.zeros((raw.shape[0], 4), dtype=np.uint8)
+            wide[:, 1:] = raw
+            return wide.view("<i4").ravel()
+    raise ValueError(f"Unsupported WAV encoding (format {audio_format}, {bits}-bit)")
+
+
+def _to_mono_float(samples, channels=1, out=None):
+    """
+    Convert interleaved PCM samples to a mono float32 signal in [-1, 1].
+
+    Float32 mono input is returned as-is (no copy); integer input is
+    scaled the same way ``librosa.load`` scales it. If ``out`` is given the
+    signal is written there instead of a new array.
+    """
+    if samples.dtype == np.uint8:
+        offset, scale = 128.0, 1.0 / 128
+    elif np.issubdtype(samples.dtype, np.integer):
+        offset, scale = 0.0, 1.0 / (2 ** (8 * samples.dtype.itemsize - 1))
+    else:
+        offset, scale = 0.0, 1.0
+
+    if channels > 1:
+        frames = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+        y = frames.mean(axis=1, dtype=np.float32, out=out)
+    elif out is not None:
+        out[...] = samples
+        y = out
+    elif samples.dtype == np.float32:
+        return samples
+    else:
+        y = samples.astype(np.float32)
+
+    if offset:
+        y -= offset
+    if scale != 1.0:
+        y *= scale
+    return y
+
+
+def wav_info(data):
+    """
+    Read the sample rate and mono length of WAV bytes without decoding them.
+
+    Returns:
+        tuple: (sr, n_samples)
+    """
+    _, channels, sr, bits, _, length = _parse_wav_header(memoryview(data).cast("B"))
+    return sr, length // (channels * (bits // 8))
+
+
+def decode_wav(data, out=None):
+    """
+    Decode WAV bytes in memory.
+
+    Args:
+        data (bytes | bytearray | memoryview): A complete WAV file, e.g. the
+            value returned by ``st_audiorec()``.
+        out (np.ndarray): Optional float32 array of ``wav_info(data)[1]``
+            samples to decode into, e.g. a shared-memory buffer.
+
+    Returns:
+        tuple: (y, sr) where ``y`` is a mono float32 array. For float32 mono
+        files decoded without ``out``, ``y`` is a read-only view over ``data``.
+    """
+    buffer = memoryview(data).cast("B")
+    audio_format, channels, sr, bits, offset, length = _parse_wav_header(buffer)
+    samples = _pcm_view(buffer, audio_format, bits, offset, length)
+    return _to_mono_float(samples, channels, out), sr
+
+
+def load_audio(audio, sr=None):
+    """
+    Normalize the accepted audio inputs to a mono float32 signal.
+
+    Args:
+        audio (bytes | np.ndarray): WAV bytes, or decoded samples shaped
+            ``(n,)`` or ``(channels, n)`` as librosa returns them.
+        sr (int): Sample rate, required when ``audio`` is an array.
+
+    Returns:
+        tuple: (y, sr)
+    """
+    if isinstance(audio, np.ndarray):
+        if sr is None:
+            raise ValueError("sr is required when passing a sample array")
+        if audio.ndim == 2:
+            y = _to_mono_float(audio).mean(axis=0, dtype=np.float32)
+        else:
+            y = _to_mono_float(audio)
+        return y, sr
+    return decode_wav(audio)
+
+
+def iter_wav_blocks(source, block_size=STREAM_BLOCK_SIZE):
+    """
+    Yield a WAV file as consecutive mono float32 blocks.
+
+    Args:
+        source (str | os.PathLike | bytes): A path, which is memory-mapped so
+            only the pages being decoded are resident, or WAV bytes.
+        block_size (int): Samples per channel in each block.
+
+    Returns:
+        tuple: (sr, blocks) where ``blocks`` is a generator of float32 arrays.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = memoryview(source).cast("B")
+    else:
+        buffer = memoryview(np.memmap(source, dtype=np.uint8, mode="r"))
+    audio_format, channels, sr, bits, offset, length = _parse_wav_header(buffer)
+    block_bytes = block_size * channels * (bits // 8)
+
+    def blocks():
+        for start in range(offset, offset + length, block_bytes):
+            size = min(block_bytes, offset + length - start)
+            samples = _pcm_view(buffer, audio_format, bits, start, size)
+            yield _to_mono_float(samples, channels)
+
+    return sr, blocks()
+
+
+def get_profile(profile=None):
+    """
+    Look up an analysis profile by name.
+
+    Args:
+        profile (str): A key of ``ANALYSIS_PROFILES``; defaults to the
+            ``VOICE_ANALYSIS_PROFILE`` environment variable, then "full".
+
+    Returns:
+        dict: The profile settings.
+    """
+    name = profile or DEFAULT_PROFILE
+    if name not in ANALYSIS_PROFILES:
+        raise ValueError(f"Unknown analysis profile '{name}'. Choose from: {', '.join(ANALYSIS_PROFILES)}")
+    return ANALYSIS_PROFILES[name]
+
+
+def _frame_starts(y, frame_length, hop_length):
+    n_frames = 1 + (len(y) - frame_length) // hop_length if len(y) >= frame_length else 0
+    return np.arange(n_frames) * hop_length
+
+
+def _frame_energy_db(y, frame_length, hop_length):
+    """Per-frame energy (dBFS) on the YIN frame grid (``center=False``), from a running sum."""
+    starts = _frame_starts(y, frame_length, hop_length)
+    power = np.concatenate(([0.0], np.cumsum(np.square(y, dtype=np.float64))))
+    energy = (power[starts + frame_length] - power[starts]) / frame_length
+    return 10 * np.log10(np.maximum(energy, 1e-12))
+
+
+def _frame_energy_zcr(y, frame_length, hop_length):
+    """
+    Per-frame energy (dBFS) and zero crossings per sample on the YIN frame grid
+    (``center=False``), from running sums so no frame matrix is built.
+    """
+    starts = _frame_starts(y, frame_length, hop_length)
+    energy_db = _frame_energy_db(y, frame_length, hop_length)
+
+    signs = np.signbit(y)
+    crossings = np.concatenate(([0], np.cumsum(signs[1:] != signs[:-1])))
+    zcr = (crossings[starts + frame_length - 1] - crossings[starts]) / (frame_length - 1)
+    return energy_db, zcr
+
+
+def detect_speech(y, sr, frame_length, hop_length, peak_db=None, after_speech=False):
+    """
+    Mark voiced-speech frames with a vectorized energy/zero-crossing detector.
+
+    Args:
+        y (np.ndarray): Mono signal.
+        sr (int): Sample rate.
+        frame_length (int): Frame length in samples.
+        hop_length (int): Hop length in samples.
+        peak_db (float): Loudest frame energy seen before ``y``, for
+            streaming callers. The loudest frame of ``y`` is always included.
+        after_speech (bool): Whether the frame just before ``y`` was voiced,
+            so a short gap at the start of ``y`` is closed too.
+
+    Returns:
+        tuple: (mask, energy_db) per frame.
+    """
+    energy_db, zcr = _frame_energy_zcr(y, frame_length, hop_length)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool), energy_db
+    peak_db = energy_db.max() if peak_db is None else max(peak_db, energy_db.max())
+
+    threshold = max(VAD_SILENCE_DB, peak_db - VAD_DYNAMIC_RANGE_DB)
+    mask = (energy_db > threshold) & (zcr * sr < VAD_MAX_CROSSINGS_PER_S)
+
+    # Close short dropouts inside a speech run
+    for start, end in _runs(~mask):
+        if (start > 0 or after_speech) and end < len(mask) and end - start <= VAD_MAX_GAP_FRAMES:
+            mask[start:end] = True
+    return mask, energy_db
+
+
+def _runs(mask):
+    """(start, end) index pairs of the True runs in a boolean array."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def _peak_energy_db(blocks, frame_length, hop_length):
+    """Loudest frame energy (dBFS) of a stream of blocks, framed as ``_VoiceFeatureEngine`` frames them."""
+    peak_db = None
+    carry = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        buffer = np.concatenate((carry, block)) if len(carry) else block
+        energy_db = _frame_energy_db(buffer, frame_length, hop_length)
+        if len(energy_db):
+            peak_db = max(float(energy_db.max()), peak_db if peak_db is not None else -np.inf)
+        carry = buffer[len(energy_db) * hop_length:]
+    return peak_db
+
+
+def _count_clipped(y):
+    return np.count_nonzero(np.abs(y) >= CLIP_LEVEL)
+
+
+def _recording_problem(n_samples, n_clipped, sr):
+    """Return a message if a recording of this length and clipping is unusable, else None."""
+    if n_samples < MIN_DURATION_S * sr:
+        return "Recording is too short for analysis"
+    if n_clipped > MAX_CLIPPED_FRACTION * n_samples:
+        return "Recording is clipped (too loud). Please record again further from the microphone"
+    return None
+
+
+def _pitch_yin(y, mask, power, settings, sr, hop_length):
+    """librosa's YIN, run over the voiced-speech spans of ``y``."""
+    import librosa
+
+    frame_length = settings["frame_length"]
+    pitches = [
+        librosa.yin(y[start * hop_length:(end - 1) * hop_length + frame_length],
+                    fmin=settings["fmin"], fmax=settings["fmax"], sr=sr,
+                    frame_length=frame_length, hop_length=hop_length, center=False)
+        for start, end in _runs(mask)
+    ]
+    return np.concatenate(pitches) if pitches else np.zeros(0, dtype=np.float32)
+
+
+@functools.lru_cache(maxsize=8)
+def _window_acf(frame_length):
+    """Normalized autocorrelation of the analysis window, for ACF correction."""
+    window = np.hanning(frame_length)
+    acf = np.fft.irfft(np.abs(np.fft.rfft(window, 2 * frame_length)) ** 2)[:frame_length]
+    return np.maximum(acf / acf[0], 1e-3)
+
+
+def _pitch_acf(y, mask, power, settings, sr, hop_length):
+    """
+    Batched autocorrelation pitch tracker in pure NumPy.
+
+    The autocorrelation of every speech frame comes from one inverse FFT of
+    the feature engine's zero-padded power spectrum, corrected for the
+    window's own autocorrelation (Boersma, 1993). The pitch period is the
+    shortest-lag peak within ``ACF_PEAK_RATIO`` of the strongest peak in the
+    search range, refined by parabolic interpolation.
+    """
+    frame_length = settings["frame_length"]
+    acf = np.fft.irfft(power, axis=1)[:, :frame_length]
+    acf /= acf[:, :1] + 1e-10
+    acf /= _window_acf(frame_length)
+
+    min_lag = max(int(np.floor(sr / settings["fmax"])), 2)
+    max_lag = min(int(np.ceil(sr / settings["fmin"])), frame_length - 2)
+    lags = np.arange(min_lag, max_lag + 1)
+
+    # Local maxima in the lag search range
+    centre = acf[:, lags]
+    peaks = (centre > acf[:, lags - 1]) & (centre >= acf[:, lags + 1])
+    values = np.where(peaks, centre, -np.inf)
+    best = values.max(axis=1, keepdims=True)
+    chosen = np.argmax(values >= ACF_PEAK_RATIO * best, axis=1)
+    no_peak = ~np.isfinite(best[:, 0])
+    chosen[no_peak] = np.argmax(centre[no_peak], axis=1)
+
+    rows = np.arange(len(acf))
+    lag = lags[chosen]
+    a, b, c = acf[rows, lag - 1], acf[rows, lag], acf[rows, lag + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = 0.5 * (a - c) / (a - 2 * b + c)
+    shift = np.where(np.isfinite(shift), np.clip(shift, -0.5, 0.5), 0.0)
+    return (sr / (lag + shift)).astype(np.float32)
+
+
+# Pitch trackers: each takes (y, speech mask, power spectrum of the speech
+# frames, profile settings, sr, hop_length) and returns one F0 per speech frame
+PITCH_BACKENDS = {
+    "yin": _pitch_yin,
+    "acf": _pitch_acf,
+}
+
+
+def get_pitch_backend(backend=None):
+    """
+    Look up a pitch tracker by name.
+
+    Args:
+        backend (str): A key of ``PITCH_BACKENDS``; defaults to the
+            ``VOICE_PITCH_BACKEND`` environment variable, then "yin".
+
+    Returns:
+        callable: The pitch tracker.
+    """
+    name = backend or DEFAULT_PITCH_BACKEND
+    if name not in PITCH_BACKENDS:
+        raise ValueError(f"Unknown pitch backend '{name}'. Choose from: {', '.join(PITCH_BACKENDS)}")
+    return PITCH_BACKENDS[name]
+
+
+def _interpret(mean_pitch, pitch_std, voiced_frames_ratio):
+    """Map the pitch statistics to emotional-state indicators."""
+    interpretation = []
+
+    # Pitch height analysis
+    if mean_pitch < 85:
+        interpretation.append("low pitch (possibly indicating sadness, fatigue, or depression)")
+    elif 85 <= mean_pitch < 165:
+        interpretation.append("moderate pitch (typical for calm, relaxed speech)")
+    elif 165 <= mean_pitch < 255:
+        interpretation.append("elevated pitch (could indicate stress or anxiety)")
+    elif 255 <= mean_pitch < 350:
+        interpretation.append("high pitch (may suggest excitement or anxiety)")
+    else:
+        interpretation.append("very high pitch (could indicate strong emotions)")
+
+    # Pitch variability analysis
+    if pitch_std < 15:
+        interpretation.append("monotonous speech (possibly indicating depression or fatigue)")
+    elif 15 <= pitch_std < 30:
+        interpretation.append("normal pitch variation")
+    else:
+        interpretation.append("high pitch variability (may suggest emotional stress or excitement)")
+
+    # Voiced speech analysis
+    if voiced_frames_ratio < 60:
+        interpretation.append("frequent pauses (could indicate anxiety or cognitive load)")
+    elif 60 <= voiced_frames_ratio < 80:
+        interpretation.append("normal speech flow")
+    else:
+        interpretation.append("rapid speech (may suggest excitement or stress)")
+
+    return interpretation
+
+
+class _RunningStats:
+    """Streaming count/mean/variance (Chan et al. pairwise update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(np.mean(values, dtype=np.float64))
+        m2 = float(np.sum((values - mean) ** 2, dtype=np.float64))
+        delta = mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def std(self):
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+def _speech_power(y, speech, window, hop_length):
+    """Zero-padded power spectra of the frames indexed by ``speech``."""
+    frame_length = len(window)
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+    return np.abs(np.fft.rfft(frames[speech] * window, 2 * frame_length, axis=1)) ** 2
+
+
+def track_pitch(y, sr, profile=None, backend=None):
+    """
+    Per-frame F0 track of a mono signal.
+
+    Args:
+        y (np.ndarray): Mono float32 signal, already at the profile's rate.
+        sr (int): Sample rate.
+        profile (str): Analysis profile name (see ``ANALYSIS_PROFILES``).
+        backend (str): Pitch tracker name (see ``PITCH_BACKENDS``).
+
+    Returns:
+        np.ndarray: F0 in Hz per frame (``center=False`` grid), NaN where
+        no voiced speech was detected.
+    """
+    settings = get_profile(profile)
+    frame_length = settings["frame_length"]
+    hop_length = frame_length // 4
+
+    mask, _ = detect_speech(y, sr, frame_length, hop_length)
+    speech = np.flatnonzero(mask)
+    f0 = np.full(len(mask), np.nan, dtype=np.float32)
+    if len(speech):
+        power = _speech_power(y, speech, np.hanning(frame_length).astype(np.float32), hop_length)
+        f0[speech] = get_pitch_backend(backend)(y, mask, power, settings, sr, hop_length)
+    return f0
+
+
+class _VoiceFeatureEngine:
+    """
+    Single-pass voice feature extraction.
+
+    Each block is framed once on the YIN frame grid. Energy and
+    zero-crossings come from running sums over that grid, the voiced-speech
+    frames share one zero-padded spectrum for spectral centroid, flux and the
+    ACF pitch tracker, pauses come from the same voice-activity mask, and YIN
+    runs only over the speech spans. Only running statistics are kept between
+    ``update`` calls, so the engine serves both the in-memory and the
+    streaming paths.
+
+    Voice activity is judged against ``peak_db``, the loudest frame of the
+    whole recording, when the caller knows it, else against the loudest
+    frame seen so far.
+    """
+
+    def __init__(self, sr, settings, pitch_backend, peak_db=None):
+        self.sr = sr
+        self.settings = settings
+        self.pitch_backend = pitch_backend
+        self.frame_length = settings["frame_length"]
+        self.hop_length = self.frame_length // 4
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+        # Spectra are zero-padded to twice the frame so the power spectrum
+        # also yields a non-circular autocorrelation
+        self.freqs = np.fft.rfftfreq(2 * self.frame_length, 1 / sr).astype(np.float32)
+
+        self.pitch = _RunningStats()
+        self.energy = _RunningStats()
+        self.centroid = _RunningStats()
+        self.flux = _RunningStats()
+
+        self.total_samples = 0
+        self.clipped_samples = 0
+        self.total_frames = 0
+        self.speech_frames = 0
+        self.peak_db = peak_db
+
+        self.pause_count = 0
+        self.pause_frames = 0
+        self.longest_pause_frames = 0
+        self._seen_speech = False
+        self._last_voiced = False
+        self._open_gap = 0
+        self._prev_spectrum = None
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    def update(self, block, last=False):
+        """
+        Add the next block of mono float32 samples.
+
+        ``last`` marks the end of the recording. Until then, a short unvoiced
+        run at the end of the block is held back with the carried samples, as
+        the next block may show it to be a dropout inside speech.
+        """
+        self.total_samples += len(block)
+        self.clipped_samples += _count_clipped(block)
+        buffer = np.concatenate((self._carry, block)) if len(self._carry) else block
+        if len(buffer) < self.frame_length:
+            self._carry = buffer
+            return
+
+        mask, energy_db = detect_speech(buffer, self.sr, self.frame_length, self.hop_length, self.peak_db,
+                                        after_speech=self._last_voiced)
+        block_peak = float(energy_db.max())
+        self.peak_db = block_peak if self.peak_db is None else max(self.peak_db, block_peak)
+        if not last:
+            voiced = np.flatnonzero(mask)
+            held = len(mask) - (voiced[-1] + 1 if len(voiced) else 0)
+            if 0 < held <= VAD_MAX_GAP_FRAMES and (len(voiced) or self._last_voiced):
+                mask, energy_db = mask[:len(mask) - held], energy_db[:len(mask) - held]
+                if not len(mask):
+                    self._carry = buffer
+                    return
+        self._last_voiced = bool(mask[-1])
+        self.total_frames += len(mask)
+        self._update_pauses(mask)
+
+        speech = np.flatnonzero(mask)
+        self.speech_frames += len(speech)
+        if len(speech):
+            self.energy.update(energy_db[speech])
+
+            power = _speech_power(buffer, speech, self.window, self.hop_length)
+            spectrum = np.sqrt(power)
+            total = spectrum.sum(axis=1) + 1e-10
+            self.centroid.update(spectrum @ self.freqs / total)
+            self._update_flux(speech, spectrum / total[:, None], len(mask))
+
+            self.pitch.update(self.pitch_backend(buffer, mask, power, self.settings, self.sr, self.hop_length))
+        else:
+            self._prev_spectrum = None
+
+        # Keep the samples the next frame still needs
+        self._carry = buffer[len(mask) * self.hop_length:]
+
+    def _update_flux(self, speech, spectra, n_frames):
+        """Spectral flux between adjacent speech frames, across block edges too."""
+        adjacent = np.flatnonzero(np.diff(speech) == 1)
+        flux = np.linalg.norm(spectra[adjacent + 1] - spectra[adjacent], axis=1)
+        if self._prev_spectrum is not None and speech[0] == 0:
+            flux = np.append(flux, np.linalg.norm(spectra[0] - self._prev_spectrum))
+        self.flux.update(flux)
+        self._prev_spectrum = spectra[-1] if speech[-1] == n_frames - 1 else None
+
+    def _update_pauses(self, mask):
+        """Count silences between speech spans, carrying an open silence across blocks."""
+        min_frames = MIN_PAUSE_S * self.sr / self.hop_length
+        if self._open_gap and len(mask) and mask[0]:
+            # The silence carried over ended exactly on the block edge
+            if self._seen_speech and self._open_gap >= min_frames:
+                self._add_pause(self._open_gap)
+            self._open_gap = 0
+        for start, end in _runs(~mask):
+            length = int(end - start)
+            if start == 0:
+                length += self._open_gap
+                seen_speech = self._seen_speech
+            else:
+                seen_speech = True
+            if end == len(mask):
+                self._open_gap = length
+                continue
+            if seen_speech and length >= min_frames:
+                self._add_pause(length)
+        if len(mask) and mask[-1]:
+            self._open_gap = 0
+        self._seen_speech |= bool(mask.any())
+
+    def _add_pause(self, length):
+        self.pause_count += 1
+        self.pause_frames += length
+        self.longest_pause_frames = max(self.longest_pause_frames, length)
+
+    def problem(self):
+        """Return a message if the recording cannot be analyzed, else None."""
+        problem = _recording_problem(self.total_samples, self.clipped_samples, self.sr)
+        if problem:
+            return problem
+        if self.pitch.count == 0 or self.speech_frames * self.hop_length < MIN_SPEECH_S * self.sr:
+            return "No speech detected in audio"
+        return None
+
+    def report(self):
+        """Build the voice report dict from the accumulated statistics."""
+        problem = self.problem()
+        if problem:
+            return problem
+
+        seconds_per_frame = self.hop_length / self.sr
+        voiced_frames_ratio = self.speech_frames / self.total_frames * 100  # Percentage of voiced frames
+        mean_pause = self.pause_frames / self.pause_count * seconds_per_frame if self.pause_count else 0.0
+
+        return {
+            "mean_pitch_hz": round(self.pitch.mean, 1),
+            "pitch_variability": round(self.pitch.std, 1),
+            "voiced_speech_percent": round(voiced_frames_ratio, 1),
+            "mean_energy_db": round(self.energy.mean, 1),
+            "energy_variability_db": round(self.energy.std, 1),
+            "spectral_centroid_hz": round(self.centroid.mean, 1),
+            "spectral_flux": round(self.flux.mean, 4),
+            "pause_count": self.pause_count,
+            "mean_pause_s": round(mean_pause, 2),
+            "longest_pause_s": round(self.longest_pause_frames * seconds_per_frame, 2),
+            "interpretation": _interpret(self.pitch.mean, self.pitch.std, voiced_frames_ratio)
+        }
+
+
+def analyze_voice(audio, sr=None, profile=None, backend=None):
+    """
+    Extract pitch, energy, spectral and pause features from a voice recording.
+
+    Args:
+        audio (bytes | np.ndarray): WAV bytes or decoded samples (see ``load_audio``).
+        sr (int): Sample rate when ``audio`` is an array.
+        profile (str): Analysis profile name (see ``ANALYSIS_PROFILES``).
+        backend (str): Pitch tracker name (see ``PITCH_BACKENDS``).
+
+    Returns:
+        dict: Voice features and interpretation, or a message string if the
+        recording could not be analyzed.
+    """
+    settings = get_profile(profile)
+    pitch_backend = get_pitch_backend(backend)
+    y, sr = load_audio(audio, sr)
+
+    # Cheap checks before resampling or any feature extraction
+    problem = _recording_problem(len(y), _count_clipped(y), sr)
+    if problem:
+        return problem
+
+    if settings["sr"] and settings["sr"] != sr:
+        import librosa
+
+        y = librosa.resample(y, orig_sr=sr, target_sr=settings["sr"])
+        sr = settings["sr"]
+
+    engine = _VoiceFeatureEngine(sr, settings, pitch_backend)
+    engine.update(y, last=True)
+    return engine.report()
+
+
+def _resample_blocks(blocks, orig_sr, target_sr):
+    """Resample a stream of blocks, keeping filter state across block edges."""
+    resampler = soxr.ResampleStream(orig_sr, target_sr, 1, dtype="float32")
+    for block in blocks:
+        yield resampler.resample_chunk(block)
+    yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def _at_profile_rate(sr, blocks, settings):
+    """(sr, blocks) resampled to the profile's rate where it sets one."""
+    if settings["sr"] and settings["sr"] != sr:
+        return settings["sr"], _resample_blocks(blocks, sr, settings["sr"])
+    return sr, blocks
+
+
+def analyze_voice_stream(source, sr=None, block_size=STREAM_BLOCK_SIZE, profile=None, backend=None):
+    """
+    Bounded-memory variant of ``analyze_voice`` for long recordings.
+
+    Blocks are fed to the same feature engine as ``analyze_voice``, and only
+    running statistics are kept between blocks. A WAV path or bytes is read
+    twice: a first pass finds the loudest frame, so voice activity is judged
+    as in ``analyze_voice`` and the report is the same. An iterable of blocks
+    is read once, so voice activity is judged against the loudest frame seen
+    so far; if a recording gets louder as it goes on, less of its start
+    counts as voiced speech than ``analyze_voice`` would find.
+
+    Args:
+        source: A WAV path or bytes (see ``iter_wav_blocks``), or an iterable
+            of mono float32 sample blocks.
+        sr (int): Sample rate, required when ``source`` is an iterable of blocks.
+        block_size (int): Samples per block when reading a WAV source.
+        profile (str): Analysis profile name (see ``ANALYSIS_PROFILES``).
+        backend (str): Pitch tracker name (see ``PITCH_BACKENDS``).
+
+    Returns:
+        dict | str: Same report as ``analyze_voice``.
+    """
+    settings = get_profile(profile)
+    pitch_backend = get_pitch_backend(backend)
+
+    peak_db = None
+    if isinstance(source, (str, bytes, bytearray, memoryview)) or hasattr(source, "__fspath__"):
+        _, first_pass = _at_profile_rate(*iter_wav_blocks(source, block_size), settings)
+        peak_db = _peak_energy_db(first_pass, settings["frame_length"], settings["frame_length"] // 4)
+        sr, blocks = iter_wav_blocks(source, block_size)
+    elif sr is None:
+        raise ValueError("sr is required when passing sample blocks")
+    else:
+        blocks = source
+    sr, blocks = _at_profile_rate(sr, blocks, settings)
+
+    engine = _VoiceFeatureEngine(sr, settings, pitch_backend, peak_db)
+    for block in blocks:
+        engine.update(block)
+    engine.update(np.zeros(0, dtype=np.float32), last=True)
+    return engine.report()
+
+
+def warm_up(profile=None, backend=None):
+    """Run one short analysis so imports and any JIT compilation are paid up front."""
+    t = np.arange(int(1.5 * 16000)) / 16000
+    tone = (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+    analyze_voice(tone, sr=16000, profile=profile, backend=backend)
+
+
+def analyze_voice_cached(audio, sr=None, profile=None, backend=None):
+    """
+    ``analyze_voice`` behind ``VOICE_CACHE``.
+
+    Results are keyed by a hash of the audio content and the resolved
+    analysis parameters, so an identical recording returns instantly across
+    Streamlit reruns and sessions in the same server process. Callers get
+    their own copy of the result.
+    """
+    profile = profile or DEFAULT_PROFILE
+    backend = backend or DEFAULT_PITCH_BACKEND
+    key = content_key(audio, sr, profile, backend)
+    result = VOICE_CACHE.get_or_compute(key, lambda: analyze_voice(audio, sr, profile, backend))
+    return copy.deepcopy(result)
@@ -0,0 +1,174 @@
+"""
+Optional out-of-process execution for voice analysis.
+
+Decoded audio is handed to a persistent pool of worker processes through
+``multiprocessing.shared_memory``: the recording is decoded straight into a
+shared segment and workers analyze a NumPy view of it, so samples are never
+pickled. ``submit_voice_analysis`` returns a ``concurrent.futures.Future``
+so the Streamlit script can keep rendering while the result is pending.
+
+Configured with environment variables:
+    VOICE_WORKERS      worker processes; 0 (default) analyzes inline
+    VOICE_QUEUE_LIMIT  maximum jobs queued or running at once (default 32)
+"""
+import copy
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import voice_analysis
+from result_cache import content_key
+
+POOL_SIZE = int(os.environ.get("VOICE_WORKERS", 0))
+QUEUE_LIMIT = int(os.environ.get("VOICE_QUEUE_LIMIT", 32))
+
+# Workers must not be forked from the multithreaded Streamlit server: a child
+# could inherit a lock another thread was holding and block on it forever
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the worker pool already has ``QUEUE_LIMIT`` jobs in flight."""
+
+
+def _attach(name):
+    """Attach to a segment owned by the parent, which is responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the segment, but pool
+        # workers share the parent's resource tracker, so this is a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+def _analyze_shared(name, n_samples, sr, profile, backend):
+    shm = _attach(name)
+    try:
+        y = np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf)
+        result = voice_analysis.analyze_voice(y, sr=sr, profile=profile, backend=backend)
+        del y
+        return result
+    finally:
+        shm.close()
+
+
+class VoiceWorkerPool:
+    """
+    A persistent process pool that analyzes recordings from shared memory.
+
+    Args:
+        size (int): Number of worker processes.
+        queue_limit (int): Maximum number of jobs queued or running at once.
+    """
+
+    def __init__(self, size=POOL_SIZE, queue_limit=QUEUE_LIMIT):
+        self.size = size
+        self.queue_limit = queue_limit
+        self._executor = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context(START_METHOD),
+                                             initializer=voice_analysis.warm_up)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def submit(self, audio, profile=None, backend=None):
+        """
+        Queue WAV bytes for analysis.
+
+        Returns:
+            Future: Resolves to the ``analyze_voice`` result. Audio that
+            cannot be decoded gives an already-failed future, as it does when
+            the analysis runs inline.
+
+        Raises:
+            QueueFullError: If ``queue_limit`` jobs are already in flight.
+        """
+        with self._lock:
+            if self._in_flight >= self.queue_limit:
+                raise QueueFullError("Voice analysis is busy. Please try again in a moment")
+            self._in_flight += 1
+
+        shm = None
+        try:
+            sr, n_samples = voice_analysis.wav_info(audio)
+            shm = shared_memory.SharedMemory(create=True, size=max(n_samples, 1) * 4)
+            voice_analysis.decode_wav(audio, out=np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf))
+            future = self._executor.submit(_analyze_shared, shm.name, n_samples, sr, profile, backend)
+        except Exception as e:
+            self._release(shm)
+            failed = Future()
+            failed.set_exception(e)
+            return failed
+        except BaseException:
+            self._release(shm)
+            raise
+        future.add_done_callback(lambda _: self._release(shm))
+        return future
+
+    def _release(self, shm):
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        with self._lock:
+            self._in_flight -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide worker pool, started on first use (None when disabled)."""
+    global _pool
+    if POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = VoiceWorkerPool()
+        return _pool
+
+
+def submit_voice_analysis(audio, profile=None, backend=None):
+    """
+    Analyze WAV bytes, on the worker pool when it is enabled.
+
+    Cached results (see ``voice_analysis.VOICE_CACHE``) come back as an
+    already-completed future, and finished pool results are added to the
+    cache. With the pool disabled the analysis runs inline.
+
+    Returns:
+        Future: Resolves to the ``analyze_voice`` result.
+
+    Raises:
+        QueueFullError: If the pool already has ``QUEUE_LIMIT`` jobs in flight.
+    """
+    profile = profile or voice_analysis.DEFAULT_PROFILE
+    backend = backend or voice_analysis.DEFAULT_PITCH_BACKEND
+    pool = get_pool()
+
+    future = Future()
+    if pool is None:
+        try:
+            future.set_result(voice_analysis.analyze_voice_cached(audio, profile=profile, backend=backend))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    key = content_key(audio, None, profile, backend)
+    cached = voice_analysis.VOICE_CACHE.get(key)
+    if cached is not None:
+        future.set_result(copy.deepcopy(cached))
+        return future
+
+    def store(done):
+        if done.exception() is None:
+            voice_analysis.VOICE_CACHE.put(key, copy.deepcopy(done.result()))
+
+    future = pool.submit(audio, profile, backend)
+    future.add_done_callback(store)
+    return future